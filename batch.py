@@ -0,0 +1,136 @@
+# batch.py
+
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from simulation import Simulation, WEAPONS
+from combat import CombatLog
+from registry import REGISTRY
+
+DAMAGE_SOURCES = WEAPONS + ('collision',)
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+def random_policy(sim, rng):
+    """Pick any action uniformly at random, shaped by the weapon's input."""
+    kind = rng.choice(WEAPONS + ('move',))
+    expects = 'direction' if kind == 'move' else REGISTRY[kind].input
+    if expects == 'key':
+        return (kind,)
+    if expects == 'direction':
+        return (kind,) + rng.choice(DIRECTIONS)
+    return (kind, rng.randrange(sim.grid.cols), rng.randrange(sim.grid.rows))
+
+def scripted_policy(sim, rng):
+    """Sword adjacent enemies, laser aligned ones, otherwise shoot the nearest."""
+    player = sim.player
+    nearest = min(
+        sim.enemies, key=lambda e: abs(e.x - player.x) + abs(e.y - player.y)
+    )
+    if abs(nearest.x - player.x) + abs(nearest.y - player.y) == 1:
+        return ('sword',)
+    if any(e.x == player.x or e.y == player.y for e in sim.enemies):
+        return ('laser',)
+    return ('gun', nearest.x, nearest.y)
+
+POLICIES = {'random': random_policy, 'scripted': scripted_policy}
+
+class DamageTally:
+    """Combat log sink summing the damage dealt to enemies per weapon.
+
+    Walking into an enemy, and enemies bumping each other, count as
+    collisions.
+    """
+
+    def __init__(self):
+        self.damage = dict.fromkeys(DAMAGE_SOURCES, 0)
+
+    def write(self, events):
+        damage = self.damage
+        for event in events:
+            if not event.player:
+                damage[event.weapon] += event.damage
+
+    def close(self):
+        pass
+
+def play_game(seed, policy='scripted', num_enemies=5, max_turns=500):
+    """Play one seeded game headless and return its result."""
+    rng = random.Random(seed)
+    sim = Simulation(num_enemies, seed)
+    tally = DamageTally()
+    sim.set_log(CombatLog([tally]))
+    choose = POLICIES[policy]
+    while not sim.is_over() and sim.turn < max_turns:
+        sim.step(choose(sim, rng))
+    sim.log.close()
+    return {
+        'seed': seed,
+        'won': sim.is_won(),
+        'turns': sim.turn,
+        'player_health': sim.player.health,
+        'damage': tally.damage,
+    }
+
+def run_batch(seeds, policy='scripted', num_enemies=5, max_turns=500, workers=None):
+    """Play seeded games across a process pool, yielding results as they finish."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(play_game, seed, policy, num_enemies, max_turns)
+            for seed in seeds
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+def summarize(results):
+    """Aggregate win rate, turns to win and damage per weapon."""
+    games = len(results)
+    wins = [result for result in results if result['won']]
+    damage = dict.fromkeys(DAMAGE_SOURCES, 0)
+    for result in results:
+        for source, amount in result['damage'].items():
+            damage[source] += amount
+    return {
+        'games': games,
+        'win_rate': len(wins) / games if games else 0.0,
+        'mean_turns_to_win': (
+            sum(result['turns'] for result in wins) / len(wins) if wins else None
+        ),
+        'damage': damage,
+        'damage_per_game': {
+            source: amount / games if games else 0.0
+            for source, amount in damage.items()
+        },
+    }
+
+def main():
+    """Run a batch of games from the command line."""
+    parser = argparse.ArgumentParser(description="Play many seeded games headless.")
+    parser.add_argument('-n', '--games', type=int, default=1000)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='scripted')
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--enemies', type=int, default=5)
+    parser.add_argument('--max-turns', type=int, default=500)
+    parser.add_argument('--workers', type=int, help="processes (default: all cores)")
+    parser.add_argument('-o', '--output', default='batch_results.jsonl',
+                        help="per-game results, one JSON object per line")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    seeds = range(args.seed, args.seed + args.games)
+    results = []
+    with open(args.output, 'w') as output:
+        for result in run_batch(
+            seeds, args.policy, args.enemies, args.max_turns, args.workers
+        ):
+            output.write(json.dumps(result) + '\n')
+            results.append(result)
+        summary = summarize(results)
+        output.write(json.dumps({'summary': summary}) + '\n')
+    elapsed = time.perf_counter() - start
+    print(json.dumps(summary, indent=2))
+    print(f"{args.games} games in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# benchmark.py
+
+import argparse
+import fnmatch
+import gc
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from settings import COLS, ROWS, WIDTH, HEIGHT, RED
+from character import Character
+from spatial import ChunkedGrid
+from simulation import (
+    Simulation, initialize_characters, handle_enemies_turn, resolve_enemies_turn
+)
+from weapons import Bullet, Mine, line_offsets, cast_spell, fire_laser, check_mines
+from utils import remove_dead_characters
+from spawner import spawn_enemies
+
+SIZES = (5, 100, 1000, 10000)
+SEED = 1234
+DENSITY = 0.1  # enemies per cell, so larger counts get larger worlds
+TURNS = 20
+FRAMES = 60
+
+def world_side(num_enemies):
+    """Side of a square world holding the enemies at the benchmark density."""
+    return max(COLS, ROWS, math.isqrt(int(num_enemies / DENSITY)) + 1)
+
+def make_world(num_enemies, seed=SEED):
+    """Place a player and enemies in a fresh world, identically for a seed."""
+    side = world_side(num_enemies)
+    grid = ChunkedGrid(side, side)
+    player, enemies = initialize_characters(num_enemies, grid, random.Random(seed))
+    return player, enemies, grid
+
+# Each benchmark takes an enemy count and does its setup, then returns
+# (run, operations): ``run()`` is the timed part and performs ``operations``
+# units of work, so results are reported per unit.
+
+def bench_get_line(n):
+    """Bresenham lines from the player to every enemy, cold cache."""
+    player, enemies, _ = make_world(n)
+    bullet = Bullet(player.x, player.y, player.x + 1, player.y)
+    targets = [(enemy.x, enemy.y) for enemy in enemies]
+    line_offsets.cache_clear()
+
+    def run():
+        for x, y in targets:
+            bullet.get_line(player.x, player.y, x, y)
+    return run, n
+
+def bench_cast_spell(n):
+    """One spell per enemy, centred on it."""
+    _, enemies, grid = make_world(n)
+    targets = [(enemy.x, enemy.y) for enemy in enemies]
+
+    def run():
+        for x, y in targets:
+            cast_spell(x, y, grid)
+    return run, n
+
+def bench_fire_laser(n):
+    """A single laser across the whole world."""
+    player, _, grid = make_world(n)
+
+    def run():
+        fire_laser(player, grid, [])
+    return run, 1
+
+def bench_check_mines(n):
+    """One mine per enemy, every tenth of them under an enemy."""
+    _, enemies, grid = make_world(n)
+    rng = random.Random(SEED)
+    mines = []
+    for index, enemy in enumerate(enemies):
+        if index % 10 == 0:
+            mines.append(Mine(enemy.x, enemy.y))
+        else:
+            mines.append(Mine(rng.randrange(grid.cols), rng.randrange(grid.rows)))
+
+    def run():
+        check_mines(mines, grid)
+    return run, 1
+
+def bench_handle_enemies_turn(n):
+    """One greedy enemy turn."""
+    player, enemies, grid = make_world(n)
+
+    def run():
+        handle_enemies_turn(enemies, player, grid)
+    return run, 1
+
+def bench_resolve_enemies_turn(n):
+    """One greedy enemy turn with every move resolved simultaneously."""
+    player, enemies, grid = make_world(n)
+
+    def run():
+        resolve_enemies_turn(enemies, player, grid)
+    return run, 1
+
+def bench_spawn_enemies(n):
+    """Spawning enemies onto a board with room left for only twice as many."""
+    side = world_side(n)
+    grid = ChunkedGrid(side, side)
+    player, _ = initialize_characters(0, grid)
+    cells = [(x, y) for y in range(side) for x in range(side) if (x, y) != (player.x, player.y)]
+    rng = random.Random(SEED)
+    rng.shuffle(cells)
+    grid.extend([Character(x, y, RED, 5) for x, y in cells[2 * n:]])
+
+    def run():
+        spawn_enemies(player, n, grid, rng)
+    return run, n
+
+def bench_remove_dead_characters(n):
+    """Dropping a dead tenth of the enemies from the list and the grid."""
+    _, enemies, grid = make_world(n)
+    for enemy in enemies[::10]:
+        enemy.health = 0
+
+    def run():
+        remove_dead_characters(enemies, grid)
+    return run, 1
+
+def _scripted_actions(sim):
+    """Cycle through every weapon relative to the player, deterministically."""
+    while True:
+        px, py = sim.player.x, sim.player.y
+        yield from (
+            ('laser',), ('sword',), ('gun', px + 6, py + 3), ('bow', 1, 0),
+            ('spell', px + 3, py - 2), ('mine', px + 1, py), ('move', 0, 1),
+        )
+
+def bench_headless_turns(n):
+    """Full turns of a headless game: the player's action and the enemies' reply."""
+    side = world_side(n)
+    sim = Simulation(n, SEED, cols=side, rows=side)
+    actions = _scripted_actions(sim)
+
+    def run():
+        for _ in range(TURNS):
+            if sim.is_over():
+                break
+            sim.step(next(actions))
+    return run, TURNS
+
+def _render_setup(n):
+    """Build a game, renderer and buttons on the dummy display."""
+    import pygame
+    from camera import Camera
+    from renderer import Renderer
+    from main import create_weapon_buttons
+    if pygame.display.get_surface() is None:
+        pygame.display.init()
+        pygame.font.init()
+        pygame.display.set_mode((WIDTH, HEIGHT))
+    side = world_side(n)
+    sim = Simulation(n, SEED, cols=side, rows=side)
+    camera = Camera(side, side)
+    renderer = Renderer(pygame.display.get_surface(), camera)
+    buttons = create_weapon_buttons(sim.player)
+    return sim, camera, renderer, buttons
+
+def bench_game_frames(n):
+    """Frames of the game loop, drawing only what changed."""
+    sim, camera, renderer, buttons = _render_setup(n)
+    actions = _scripted_actions(sim)
+
+    def run():
+        for _ in range(FRAMES):
+            if sim.accepts_input() and not sim.is_over():
+                sim.perform(next(actions))
+            camera.follow(sim.player.x, sim.player.y)
+            renderer.render(sim, buttons)
+            sim.tick()
+    return run, FRAMES
+
+def bench_full_redraw(n):
+    """Complete redraws of the visible part of the world."""
+    sim, camera, renderer, buttons = _render_setup(n)
+    camera.follow(sim.player.x, sim.player.y)
+
+    def run():
+        for _ in range(FRAMES):
+            renderer.previous = None
+            renderer.render(sim, buttons)
+    return run, FRAMES
+
+MICRO = {
+    'get_line': bench_get_line,
+    'cast_spell': bench_cast_spell,
+    'fire_laser': bench_fire_laser,
+    'check_mines': bench_check_mines,
+    'handle_enemies_turn': bench_handle_enemies_turn,
+    'resolve_enemies_turn': bench_resolve_enemies_turn,
+    'remove_dead_characters': bench_remove_dead_characters,
+    'spawn_enemies': bench_spawn_enemies,
+}
+MACRO = {
+    'headless_turns': bench_headless_turns,
+    'game_frames': bench_game_frames,
+    'full_redraw': bench_full_redraw,
+}
+BENCHMARKS = {**MICRO, **MACRO}
+
+def measure(benchmark, n, repeat):
+    """Time a benchmark ``repeat`` times from a fresh setup each time.
+
+    Returns seconds per unit of work for every run. The garbage collector
+    is paused while timing, as ``timeit`` does.
+    """
+    times = []
+    for _ in range(repeat):
+        run, operations = benchmark(n)
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        times.append(elapsed / operations)
+    return times
+
+def run_benchmarks(names, sizes, repeat):
+    """Run the selected benchmarks at every size, yielding (key, stats)."""
+    for name in names:
+        for n in sizes:
+            times = measure(BENCHMARKS[name], n, repeat)
+            yield f"{name}[{n}]", {
+                'median': statistics.median(times),
+                'min': min(times),
+                'runs': len(times),
+            }
+
+def environment():
+    """Describe the machine and interpreter the results came from."""
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'numpy': numpy_version,
+        'seed': SEED,
+    }
+
+def compare(baseline, current, threshold):
+    """Return (key, baseline, current, ratio, verdict) for shared results.
+
+    A median more than ``threshold`` slower than the baseline is a
+    regression; more than ``threshold`` faster is an improvement.
+    """
+    rows = []
+    for key, stats in current.items():
+        if key not in baseline:
+            continue
+        before, after = baseline[key]['median'], stats['median']
+        ratio = after / before if before else float('inf')
+        if ratio > 1 + threshold:
+            verdict = 'REGRESSION'
+        elif ratio < 1 - threshold:
+            verdict = 'faster'
+        else:
+            verdict = ''
+        rows.append((key, before, after, ratio, verdict))
+    return rows
+
+def format_time(seconds):
+    """Format a duration with a readable unit."""
+    for unit, scale in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds * scale >= 1:
+            return f"{seconds * scale:.3g} {unit}"
+    return f"{seconds * 1e9:.3g} ns"
+
+def main():
+    """Run the benchmarks or compare saved results from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths.")
+    parser.add_argument('-k', '--select', action='append', metavar='PATTERN',
+                        help="only run benchmarks matching this glob (repeatable)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help="enemy counts to run each benchmark at")
+    parser.add_argument('--repeat', type=int, default=7,
+                        help="timed runs per benchmark, each from a fresh setup")
+    parser.add_argument('-o', '--output', metavar='PATH', help="save results as JSON")
+    parser.add_argument('--compare', nargs='+', metavar='PATH',
+                        help="BASELINE [CURRENT]: compare against a saved run; "
+                             "with two files, compare them without running")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="relative slowdown reported as a regression")
+    parser.add_argument('--list', action='store_true', help="list the benchmarks")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, benchmark in BENCHMARKS.items():
+            kind = 'micro' if name in MICRO else 'macro'
+            print(f"{name:24} {kind}  {benchmark.__doc__}")
+        return
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline and at most one current file")
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[1]) as file:
+            results = json.load(file)['results']
+    else:
+        # Rendering benchmarks draw to an invisible window
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        names = [
+            name for name in BENCHMARKS
+            if not args.select
+            or any(fnmatch.fnmatch(name, pattern) for pattern in args.select)
+        ]
+        results = {}
+        for key, stats in run_benchmarks(names, args.sizes, args.repeat):
+            results[key] = stats
+            print(f"{key:36} {format_time(stats['median']):>10}  "
+                  f"(min {format_time(stats['min'])})", flush=True)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump({'environment': environment(), 'results': results},
+                          file, indent=2)
+
+    if args.compare:
+        with open(args.compare[0]) as file:
+            baseline = json.load(file)['results']
+        rows = compare(baseline, results, args.threshold)
+        print(f"\n{'benchmark':36} {'baseline':>10} {'current':>10} {'ratio':>7}")
+        for key, before, after, ratio, verdict in rows:
+            print(f"{key:36} {format_time(before):>10} {format_time(after):>10} "
+                  f"{ratio:7.2f}  {verdict}")
+        if any(verdict == 'REGRESSION' for *_, verdict in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
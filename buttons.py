@@ -2,6 +2,7 @@
 
 import pygame
 from settings import WHITE, BLACK, LIGHT_GRAY, FONT_NAME, FONT_SIZE
+from fonts import get_font, render_text
 
 class Button:
     """Represents a clickable button in the game UI."""
@@ -11,14 +12,14 @@ class Button:
         self.text = text
         self.callback = callback
         self.selected = False
-        self.font = pygame.font.SysFont(FONT_NAME, FONT_SIZE)
+        self.font = get_font(FONT_NAME, FONT_SIZE)
 
     def draw(self, surface):
         """Draw the button on the given surface."""
         color = LIGHT_GRAY if self.selected else WHITE
         pygame.draw.rect(surface, color, self.rect)
         pygame.draw.rect(surface, BLACK, self.rect, 2)
-        text_surf = self.font.render(self.text, True, BLACK)
+        text_surf = render_text(self.font, self.text, BLACK)
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
 
@@ -0,0 +1,32 @@
+# camera.py
+
+from settings import COLS, ROWS, CELL_SIZE
+
+class Camera:
+    """The window's view onto the world, measured in whole cells."""
+
+    def __init__(self, world_cols, world_rows, view_cols=COLS, view_rows=ROWS):
+        self.world_cols = world_cols
+        self.world_rows = world_rows
+        self.view_cols = view_cols
+        self.view_rows = view_rows
+        self.x = 0
+        self.y = 0
+
+    def follow(self, x, y):
+        """Centre the view on a cell, clamped to the edges of the world."""
+        self.x = max(0, min(x - self.view_cols // 2, self.world_cols - self.view_cols))
+        self.y = max(0, min(y - self.view_rows // 2, self.world_rows - self.view_rows))
+
+    @property
+    def offset(self):
+        """Pixel offset that turns world positions into screen positions."""
+        return (-self.x * CELL_SIZE, -self.y * CELL_SIZE)
+
+    def to_world(self, pixel_x, pixel_y):
+        """Convert a screen pixel into the world cell under it."""
+        return pixel_x // CELL_SIZE + self.x, pixel_y // CELL_SIZE + self.y
+
+    def visible_cells(self):
+        """Return the (x0, y0, x1, y1) cell range in view, end-exclusive."""
+        return self.x, self.y, self.x + self.view_cols, self.y + self.view_rows
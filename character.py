@@ -1,11 +1,14 @@
 # character.py
 
-import pygame
-from settings import CELL_SIZE, RED, GREEN, COLS, ROWS
+from settings import COLLISION_DAMAGE
+from registry import REGISTRY
+from combat import NULL_LOG
 
 class Character:
     """Represents a character in the game, such as the player or an enemy."""
 
+    __slots__ = ('x', 'y', 'color', 'health', 'max_health', 'current_weapon')
+
     def __init__(self, x, y, color, health):
         """Initialize the character with position, color, and health."""
         self.x = x
@@ -15,65 +18,59 @@ class Character:
         self.max_health = health
         self.current_weapon = 'sword'  # Default weapon
 
-    def draw(self, screen):
-        """Draw the character and its health bar on the screen."""
-        rect = pygame.Rect(self.x * CELL_SIZE, self.y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-        pygame.draw.rect(screen, self.color, rect)
-        self.draw_health_bar(screen)
-
-    def draw_health_bar(self, screen):
-        """Draw the health bar above the character."""
-        health_ratio = self.health / self.max_health
-        bar_width = int(CELL_SIZE * health_ratio)
-        bar_height = max(3, CELL_SIZE // 10)
-        bar_x = self.x * CELL_SIZE
-        bar_y = self.y * CELL_SIZE - bar_height - 2
-        background_rect = pygame.Rect(bar_x, bar_y, CELL_SIZE, bar_height)
-        health_rect = pygame.Rect(bar_x, bar_y, bar_width, bar_height)
-        pygame.draw.rect(screen, RED, background_rect)
-        pygame.draw.rect(screen, GREEN, health_rect)
+    def move(self, dx, dy, grid, others=(), log=NULL_LOG):
+        """Move the character if possible, checking for collisions.
 
-    def move(self, dx, dy, others):
-        """Move the character if possible, checking for collisions."""
+        ``grid`` is the occupancy grid of enemies; ``others`` lists any
+        characters not indexed in it (such as the player). Returns True if
+        the character bumped into another.
+        """
         new_x = self.x + dx
         new_y = self.y + dy
-        if 0 <= new_x < COLS and 0 <= new_y < ROWS:
-            if not self.check_collision(new_x, new_y, others):
-                self.x = new_x
-                self.y = new_y
+        if grid.in_bounds(new_x, new_y):
+            if self.check_collision(new_x, new_y, grid, others, log):
+                return True
+            grid.move(self, new_x, new_y)
+            self.x = new_x
+            self.y = new_y
+        return False
 
-    def check_collision(self, new_x, new_y, others):
+    def check_collision(self, new_x, new_y, grid, others=(), log=NULL_LOG):
         """Check for collision with other characters."""
-        for other in others:
-            if other.is_at(new_x, new_y):
-                self.health -= 1
-                other.health -= 1
-                print(f"Collision! {self} and {other} lose 1 health.")
-                return True
+        other = grid.at(new_x, new_y)
+        if other is None:
+            for candidate in others:
+                if candidate.is_at(new_x, new_y):
+                    other = candidate
+                    break
+        if other is not None and other is not self:
+            self.health -= COLLISION_DAMAGE
+            other.health -= COLLISION_DAMAGE
+            log.hit('collision', self.x, self.y, other, COLLISION_DAMAGE)
+            log.hit('collision', other.x, other.y, self, COLLISION_DAMAGE)
+            return True
         return False
 
     def is_at(self, x, y):
         """Check if the character is at a specific grid position."""
         return self.x == x and self.y == y
 
-    def attack_with_sword(self, enemies):
+    def attack_with_sword(self, grid, log=NULL_LOG):
         """Attack adjacent enemies with the sword."""
         directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
         for dx, dy in directions:
-            if self.attack_direction(dx, dy, enemies):
+            if self.attack_direction(dx, dy, grid, log):
                 return True
-        print("No enemy adjacent to attack.")
         return False
 
-    def attack_direction(self, dx, dy, enemies):
+    def attack_direction(self, dx, dy, grid, log=NULL_LOG):
         """Attack in a specific direction."""
-        target_x = self.x + dx
-        target_y = self.y + dy
-        for enemy in enemies:
-            if enemy.is_at(target_x, target_y):
-                enemy.health -= 2  # Sword damage
-                print(f"Sword attack! {enemy} loses 2 health.")
-                return True
+        enemy = grid.at(self.x + dx, self.y + dy)
+        if enemy is not None:
+            damage = REGISTRY['sword'].damage
+            enemy.health -= damage
+            log.hit('sword', self.x, self.y, enemy, damage)
+            return True
         return False
 
     def __repr__(self):
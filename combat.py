@@ -0,0 +1,215 @@
+# combat.py
+
+import json
+import struct
+import sys
+from collections import deque
+from settings import (
+    COMBAT_LOG_CAPACITY, COMBAT_LOG_BATCH, COMBAT_LOG_LINES
+)
+from registry import REGISTRY
+
+class CombatEvent:
+    """One hit: who dealt it, to whom, with what, and the health left."""
+
+    __slots__ = (
+        'turn', 'weapon', 'source_x', 'source_y', 'target_x', 'target_y',
+        'player', 'damage', 'health'
+    )
+
+    def __init__(
+        self, turn, weapon, source_x, source_y, target_x, target_y, player,
+        damage, health
+    ):
+        self.turn = turn
+        self.weapon = weapon
+        self.source_x = source_x
+        self.source_y = source_y
+        self.target_x = target_x
+        self.target_y = target_y
+        self.player = player  # True when the player was hit
+        self.damage = damage
+        self.health = health
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"CombatEvent({self.as_dict()})"
+
+def format_event(event):
+    """Describe an event as a line of text."""
+    target = "Player" if event.player else f"Enemy at ({event.target_x}, {event.target_y})"
+    return (f"{event.weapon.capitalize()} hit! {target} loses {event.damage} "
+            f"health ({event.health} left).")
+
+class NullCombatLog:
+    """Stand-in with the CombatLog interface that records nothing."""
+
+    enabled = False
+
+    def hit(self, weapon, source_x, source_y, target, damage):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+NULL_LOG = NullCombatLog()
+
+class CombatLog:
+    """Typed combat events in a ring buffer, handed to sinks in batches.
+
+    Weapon code calls ``hit`` right after changing a character's health.
+    The event goes into a pending batch; every ``batch_size`` events, and
+    at the end of every turn, the batch is moved into ``recent``, which
+    keeps the last ``capacity`` events, and passed to each sink's
+    ``write``. Attach a log to a game with ``Simulation.set_log``, so it
+    knows the turn and which character is the player.
+    """
+
+    enabled = True
+
+    def __init__(self, sinks=(), capacity=COMBAT_LOG_CAPACITY, batch_size=COMBAT_LOG_BATCH):
+        self.sinks = list(sinks)
+        self.recent = deque(maxlen=capacity)
+        self.pending = []
+        self.batch_size = batch_size
+        self.turn = 0
+        self.player = None
+        self.count = 0
+
+    def hit(self, weapon, source_x, source_y, target, damage):
+        """Record that ``target`` lost ``damage`` health to a weapon."""
+        self.pending.append(CombatEvent(
+            self.turn, weapon, source_x, source_y, target.x, target.y,
+            target is self.player, damage, target.health
+        ))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Pass the pending events to the ring buffer and every sink."""
+        batch = self.pending
+        if not batch:
+            return
+        self.pending = []
+        self.count += len(batch)
+        self.recent.extend(batch)
+        for sink in self.sinks:
+            sink.write(batch)
+
+    def close(self):
+        """Flush and close every sink."""
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+
+class JsonLinesSink:
+    """Writes each event as one JSON object per line."""
+
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def write(self, events):
+        self.file.write(''.join(json.dumps(event.as_dict()) + '\n' for event in events))
+
+    def close(self):
+        self.file.close()
+
+class TextSink:
+    """Writes each event as a readable line to an open text stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, events):
+        self.stream.write(''.join(format_event(event) + '\n' for event in events))
+
+    def close(self):
+        self.stream.flush()
+
+# Binary log layout: a header naming the weapons, then fixed-size records
+MAGIC = b'RLCE'
+VERSION = 1
+HEADER = struct.Struct('<4sBB')  # magic, version, number of weapon names
+RECORD = struct.Struct('<IBiiii?ii')
+# turn, weapon, source x, y, target x, y, player hit, damage, health left
+
+class BinarySink:
+    """Writes events as fixed-size binary records; see ``read_binary_log``.
+
+    Weapons are stored as indices into the names in the header, so the
+    file reads back correctly even after ``weapons.json`` changes.
+    """
+
+    def __init__(self, path):
+        self.names = REGISTRY.names + ('collision',)
+        self.codes = {name: code for code, name in enumerate(self.names)}
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(self.names)))
+        self.file.write(b''.join(name.encode() + b'\0' for name in self.names))
+
+    def write(self, events):
+        pack = RECORD.pack
+        codes = self.codes
+        self.file.write(b''.join(
+            pack(e.turn, codes[e.weapon], e.source_x, e.source_y, e.target_x,
+                 e.target_y, e.player, e.damage, e.health)
+            for e in events
+        ))
+
+    def close(self):
+        self.file.close()
+
+def read_binary_log(path):
+    """Yield the events stored by a ``BinarySink``."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    magic, version, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a combat log")
+    offset = HEADER.size
+    names = []
+    for _ in range(count):
+        end = data.index(b'\0', offset)
+        names.append(data[offset:end].decode())
+        offset = end + 1
+    # Ignore a partly written last record, e.g. after a crash
+    end = offset + (len(data) - offset) // RECORD.size * RECORD.size
+    for record in RECORD.iter_unpack(data[offset:end]):
+        turn, code, *fields = record
+        yield CombatEvent(turn, names[code], *fields)
+
+def open_sink(path):
+    """Pick a sink by path: ``-`` for text on stdout, ``.jsonl`` for JSON lines, else binary."""
+    if path == '-':
+        return TextSink(sys.stdout)
+    if path.endswith('.jsonl'):
+        return JsonLinesSink(path)
+    return BinarySink(path)
+
+class ScreenLog:
+    """Sink keeping the last few events as text for an on-screen overlay.
+
+    Only the newest ``lines`` events of a batch are formatted. Add it to
+    ``Renderer.overlays``; the lines are redrawn only when they change.
+    """
+
+    def __init__(self, lines=COMBAT_LOG_LINES, position=(5, 450), font_size=18):
+        self.lines = deque(maxlen=lines)
+        self.position = position
+        self.font_size = font_size
+
+    def write(self, events):
+        self.lines.extend(format_event(event) for event in events[-self.lines.maxlen:])
+
+    def close(self):
+        pass
+
+    def drawable(self):
+        """Return the overlay as a (key, rects, draw) entry for the renderer."""
+        from fonts import text_drawable
+        return text_drawable(('combat_log',), self.lines, self.position, self.font_size)
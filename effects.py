@@ -1,12 +1,15 @@
 # effects.py
 
-import pygame
-from settings import PURPLE, CYAN, CELL_SIZE
-
 class SpellEffect:
     """Represents the visual effect of a spell being cast."""
 
+    __slots__ = ('x', 'y', 'radius', 'duration')
+
     def __init__(self, x, y, radius, duration=30):
+        self.reset(x, y, radius, duration)
+
+    def reset(self, x, y, radius, duration=30):
+        """Start the effect; pooled effects are reused through this."""
         self.x = x
         self.y = y
         self.radius = radius
@@ -16,11 +19,6 @@ class SpellEffect:
         """Update the effect's duration."""
         self.duration -= 1
 
-    def draw(self, screen):
-        """Draw the spell effect on the screen."""
-        if self.duration > 0:
-            pygame.draw.circle(screen, PURPLE, (self.x, self.y), self.radius, 1)
-
     def is_finished(self):
         """Check if the effect has finished displaying."""
         return self.duration <= 0
@@ -28,26 +26,38 @@ class SpellEffect:
 class LaserEffect:
     """Represents the visual effect of a laser being fired."""
 
+    __slots__ = ('paths', 'bounds', 'duration', 'overlay')
+
     def __init__(self, paths, duration=10):
+        self.reset(paths, duration)
+
+    def reset(self, paths, duration=10):
+        """Start the effect; pooled effects are reused through this."""
         self.paths = paths
+        # Cell-space (min_x, min_y, max_x, max_y) per beam, computed once
+        self.bounds = []
+        for path in paths:
+            if path:
+                xs = [x for x, _ in path]
+                ys = [y for _, y in path]
+                self.bounds.append((min(xs), min(ys), max(xs), max(ys)))
         self.duration = duration
+        self.overlay = None
 
     def update(self):
         """Update the effect's duration."""
         self.duration -= 1
 
-    def draw(self, screen):
-        """Draw the laser effect on the screen."""
-        if self.duration > 0:
-            for path in self.paths:
-                for x, y in path:
-                    rect = pygame.Rect(
-                        x * CELL_SIZE + CELL_SIZE // 3,
-                        y * CELL_SIZE + CELL_SIZE // 3,
-                        CELL_SIZE // 3,
-                        CELL_SIZE // 3
-                    )
-                    pygame.draw.rect(screen, CYAN, rect)
+    def blits(self, atlas, offset=(0, 0)):
+        """Return the blits of the on-screen part of every beam from a ``SpriteAtlas``.
+
+        Built once per effect and kept while the view stays put, so each
+        beam costs one blit per frame rather than one rect per cell.
+        """
+        if self.overlay is None or self.overlay[0] != offset:
+            beams = [atlas.beam(bounds, offset) for bounds in self.bounds]
+            self.overlay = (offset, [beam for beam in beams if beam is not None])
+        return self.overlay[1]
 
     def is_finished(self):
         """Check if the effect has finished displaying."""
@@ -0,0 +1,144 @@
+# enemy_arrays.py
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the grid-based weapon code is used instead
+    np = None
+from registry import REGISTRY
+from combat import NULL_LOG
+
+class EnemyArrays:
+    """Parallel NumPy arrays of enemy x and y for the laser and enemy moves.
+
+    A laser is resolved with one mask over the whole swarm; only the
+    enemies actually hit have their ``Character`` health changed. Spells
+    and mines touch a few cells each, so they always use the grid.
+    Simultaneous enemy moves are resolved over the same arrays, which then
+    take the movers' new cells. The ``Simulation`` syncs the arrays once
+    per turn and appends spawned enemies, so enemies killed since the last
+    sync may still be listed; they are skipped when dealing damage.
+    """
+
+    def __init__(self, cols):
+        if np is None:
+            raise RuntimeError("EnemyArrays requires NumPy")
+        self.cols = cols
+        self.enemies = []
+        self.x = np.empty(0, dtype=np.int64)
+        self.y = np.empty(0, dtype=np.int64)
+
+    def sync(self, enemies):
+        """Rebuild the arrays from the current enemy list, an O(n) pass."""
+        count = len(enemies)
+        self.enemies = list(enemies)
+        self.x = np.fromiter((e.x for e in enemies), dtype=np.int64, count=count)
+        self.y = np.fromiter((e.y for e in enemies), dtype=np.int64, count=count)
+
+    def extend(self, enemies):
+        """Append newly spawned enemies."""
+        if not enemies:
+            return
+        count = len(enemies)
+        xs = np.fromiter((e.x for e in enemies), dtype=np.int64, count=count)
+        ys = np.fromiter((e.y for e in enemies), dtype=np.int64, count=count)
+        self.enemies.extend(enemies)
+        self.x = np.concatenate((self.x, xs))
+        self.y = np.concatenate((self.y, ys))
+
+    def _damage(self, mask, damage, weapon, source, log):
+        """Deal damage to every living enemy in a boolean mask.
+
+        ``source`` returns the cell a hit on an enemy came from. Returns
+        True if any enemy was hit.
+        """
+        hit = False
+        for index in np.flatnonzero(mask).tolist():
+            enemy = self.enemies[index]
+            if enemy.health <= 0:
+                # Killed since the last sync and already off the grid
+                continue
+            enemy.health -= damage
+            log.hit(weapon, *source(enemy), enemy, damage)
+            hit = True
+        return hit
+
+    def fire_laser(self, player, grid, laser_paths, log=NULL_LOG):
+        """Damage every enemy in the player's row or column; return True on a hit."""
+        px, py = player.x, player.y
+        laser_paths.extend([
+            [(x, py) for x in range(px - 1, -1, -1)],
+            [(x, py) for x in range(px + 1, grid.cols)],
+            [(px, y) for y in range(py - 1, -1, -1)],
+            [(px, y) for y in range(py + 1, grid.rows)],
+        ])
+        mask = ((self.x == px) != (self.y == py))
+        return self._damage(mask, REGISTRY['laser'].damage, 'laser', lambda enemy: (px, py), log)
+
+    def resolve_moves(self, steps, player, grid):
+        """Resolve simultaneous enemy moves like ``simulation.resolve_moves``.
+
+        Every conflict is found with array operations over the whole swarm:
+        claims on a cell by sorting the target cells, occupants by a
+        search of the sorted current cells. A blocked move blocks the
+        enemies queued behind it, one link of the queue per pass. ``steps``
+        must match the arrays' enemies, so sync first; the movers' new
+        cells are written into the arrays.
+        """
+        enemies = self.enemies
+        count = len(enemies)
+        if not count:
+            return [], []
+        dx = np.fromiter((0 if s is None else s[0] for s in steps), dtype=np.int64, count=count)
+        dy = np.fromiter((0 if s is None else s[1] for s in steps), dtype=np.int64, count=count)
+        tx, ty = self.x + dx, self.y + dy
+        moving = (
+            ((dx != 0) | (dy != 0))
+            & (tx >= 0) & (tx < grid.cols) & (ty >= 0) & (ty < grid.rows)
+        )
+        cols = grid.cols
+        here = self.y * cols + self.x
+        target = np.where(moving, ty * cols + tx, -1)
+        collisions = []
+
+        hits_player = moving & (tx == player.x) & (ty == player.y)
+        for index in np.flatnonzero(hits_player).tolist():
+            collisions.append((enemies[index], player))
+        claimed, first, claims = np.unique(target, return_index=True, return_counts=True)
+        contested = moving & ~hits_player & (claims[np.searchsorted(claimed, target)] > 1)
+        # One collision per contested cell, in order of its first claimant
+        contested_cells = claimed[(claims > 1) & (claimed >= 0)]
+        for cell in contested_cells[np.argsort(first[(claims > 1) & (claimed >= 0)])].tolist():
+            if cell != player.y * cols + player.x:
+                indices = np.flatnonzero(target == cell).tolist()
+                collisions.append(tuple(enemies[index] for index in indices))
+        blocked = hits_player | contested
+
+        order = np.argsort(here)
+        sorted_here = here[order]
+        slots = np.minimum(np.searchsorted(sorted_here, target), count - 1)
+        occupied = moving & (sorted_here[slots] == target)
+        occupant = np.where(occupied, order[slots], 0)
+
+        free = moving & ~blocked
+        swap = free & occupied & free[occupant] & (target[occupant] == here)
+        for index in np.flatnonzero(swap).tolist():
+            partner = int(occupant[index])
+            if index < partner:
+                collisions.append((enemies[index], enemies[partner]))
+        blocked |= swap
+        while True:
+            stuck = ~moving | blocked
+            bumped = moving & ~blocked & occupied & stuck[occupant]
+            if not bumped.any():
+                break
+            for index in np.flatnonzero(bumped).tolist():
+                collisions.append((enemies[index], enemies[int(occupant[index])]))
+            blocked |= bumped
+        moved = np.flatnonzero(moving & ~blocked)
+        self.x[moved] = tx[moved]
+        self.y[moved] = ty[moved]
+        movers = [
+            (enemies[index], int(tx[index]), int(ty[index]))
+            for index in moved.tolist()
+        ]
+        return movers, collisions
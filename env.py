@@ -0,0 +1,198 @@
+# env.py
+
+import random
+from functools import lru_cache
+try:
+    import numpy as np
+except ImportError:  # Only the environments need NumPy; the game itself does not
+    np = None
+from registry import REGISTRY
+from simulation import Simulation, WEAPONS
+
+# Observation channels, each a rows x cols plane of the board
+PLAYER, ENEMIES, MINES, HEALTH = range(4)
+CHANNELS = 4
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+WIN_REWARD = 10.0
+LOSS_REWARD = -10.0
+MAX_TURNS = 500
+
+@lru_cache(maxsize=None)
+def action_table(cols, rows):
+    """Every distinct action on a board, in the order of the discrete actions.
+
+    Moves come first, then each weapon in registry order: one action for
+    a key weapon, four for a direction weapon, one per cell for a click
+    weapon.
+    """
+    actions = [('move', dx, dy) for dx, dy in DIRECTIONS]
+    for name in WEAPONS:
+        expects = REGISTRY[name].input
+        if expects == 'key':
+            actions.append((name,))
+        elif expects == 'direction':
+            actions.extend((name, dx, dy) for dx, dy in DIRECTIONS)
+        else:
+            actions.extend((name, x, y) for y in range(rows) for x in range(cols))
+    return tuple(actions)
+
+def damage_dealt(enemies, health_before):
+    """Health the given enemies lost since ``health_before``, counting the dead as zero.
+
+    Enemies that arrived in a wave after ``health_before`` was taken are
+    not among ``enemies`` and so do not count.
+    """
+    return sum(
+        health - max(enemy.health, 0) for enemy, health in zip(enemies, health_before)
+    )
+
+class GameEnv:
+    """A single game behind the ``reset()`` / ``step(action)`` interface.
+
+    Follows the Gymnasium conventions without depending on it: ``reset``
+    returns ``(observation, info)`` and ``step`` returns ``(observation,
+    reward, terminated, truncated, info)``. An action is an index into
+    ``action_table`` or a ``Simulation`` action tuple. The reward is the
+    damage dealt minus the damage taken, plus a bonus for winning and a
+    penalty for dying.
+    """
+
+    def __init__(
+        self, num_enemies=5, max_turns=MAX_TURNS, seed=None, **sim_options
+    ):
+        if np is None:
+            raise RuntimeError("GameEnv requires NumPy")
+        self.num_enemies = num_enemies
+        self.max_turns = max_turns
+        self.sim_options = sim_options
+        self.seeds = random.Random(seed)
+        self.sim = None
+        self.observation = None
+        self.reset()
+        grid = self.sim.grid
+        self.actions = action_table(grid.cols, grid.rows)
+        self.action_count = len(self.actions)
+
+    @property
+    def observation_shape(self):
+        """Channels, rows and columns of an observation."""
+        return (CHANNELS, self.sim.grid.rows, self.sim.grid.cols)
+
+    def reset(self, seed=None, out=None):
+        """Start a new game; with no seed, one is drawn from the env's own RNG.
+
+        The observation is written into ``out`` when given, so a
+        ``VectorEnv`` can point every game at a slice of one buffer.
+        """
+        if seed is None:
+            seed = self.seeds.randrange(2 ** 32)
+        self.sim = Simulation(self.num_enemies, seed, **self.sim_options)
+        grid = self.sim.grid
+        if out is None:
+            out = np.zeros((CHANNELS, grid.rows, grid.cols), dtype=np.float32)
+        self.observation = out
+        return self.observe(), self.info()
+
+    def observe(self):
+        """Write the board into the observation array and return it."""
+        sim = self.sim
+        obs = self.observation
+        obs.fill(0.0)
+        player = sim.player
+        if player.health > 0:
+            obs[PLAYER, player.y, player.x] = 1.0
+            obs[HEALTH, player.y, player.x] = player.health / player.max_health
+        enemies = sim.enemies
+        if enemies:
+            count = len(enemies)
+            xs = np.fromiter((e.x for e in enemies), dtype=np.intp, count=count)
+            ys = np.fromiter((e.y for e in enemies), dtype=np.intp, count=count)
+            obs[ENEMIES, ys, xs] = 1.0
+            obs[HEALTH, ys, xs] = np.fromiter(
+                (e.health / e.max_health for e in enemies), dtype=np.float32, count=count
+            )
+        for mine in sim.mines:
+            if mine.active:
+                obs[MINES, mine.y, mine.x] = 1.0
+        return obs
+
+    def info(self):
+        """Return the seed, turn and remaining health and enemies."""
+        sim = self.sim
+        return {
+            'seed': sim.seed,
+            'turn': sim.turn,
+            'player_health': sim.player.health,
+            'enemies': len(sim.enemies),
+        }
+
+    def step(self, action):
+        """Play one turn and return the Gymnasium five-tuple."""
+        sim = self.sim
+        if not isinstance(action, tuple):
+            action = self.actions[action]
+        health_before = sim.player.health
+        enemies = list(sim.enemies)
+        enemy_health = [enemy.health for enemy in enemies]
+        sim.step(action)
+        reward = float(
+            damage_dealt(enemies, enemy_health)
+            - (health_before - max(sim.player.health, 0))
+        )
+        terminated = sim.is_over()
+        if terminated:
+            reward += WIN_REWARD if sim.is_won() else LOSS_REWARD
+        truncated = not terminated and sim.turn >= self.max_turns
+        return self.observe(), reward, terminated, truncated, self.info()
+
+class VectorEnv:
+    """K independent games stepped in lockstep over shared arrays.
+
+    Observations, rewards and done flags live in preallocated arrays with
+    the game as the leading axis; every game writes into its own slice, so
+    a step allocates no arrays. The returned arrays are reused by the next
+    step. A finished game is reset at once, the batch observation showing
+    its new first state and its info carrying ``final_observation`` and
+    ``final_info``.
+    """
+
+    def __init__(self, num_envs, num_enemies=5, max_turns=MAX_TURNS, seed=None, **options):
+        seeds = random.Random(seed)
+        self.envs = [
+            GameEnv(num_enemies, max_turns, seeds.randrange(2 ** 32), **options)
+            for _ in range(num_envs)
+        ]
+        self.num_envs = num_envs
+        first = self.envs[0]
+        self.action_count = first.action_count
+        self.observations = np.zeros((num_envs,) + first.observation_shape, dtype=np.float32)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        for env, out in zip(self.envs, self.observations):
+            env.observation = out
+            env.observe()
+
+    def reset(self, seed=None):
+        """Start every game again, seeding game ``i`` with ``seed + i`` if given."""
+        infos = []
+        for index, (env, out) in enumerate(zip(self.envs, self.observations)):
+            _, info = env.reset(None if seed is None else seed + index, out=out)
+            infos.append(info)
+        return self.observations, infos
+
+    def step(self, actions):
+        """Apply one action per game; return batched arrays and a list of infos."""
+        infos = []
+        for index, (env, action) in enumerate(zip(self.envs, actions)):
+            if not isinstance(action, tuple):
+                action = int(action)
+            obs, reward, terminated, truncated, info = env.step(action)
+            self.rewards[index] = reward
+            self.terminated[index] = terminated
+            self.truncated[index] = truncated
+            if terminated or truncated:
+                info = {'final_observation': obs.copy(), 'final_info': info}
+                env.reset(out=obs)
+            infos.append(info)
+        return self.observations, self.rewards, self.terminated, self.truncated, infos
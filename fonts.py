@@ -0,0 +1,34 @@
+# fonts.py
+
+import functools
+import pygame
+from settings import TEXT_CACHE_SIZE, FONT_NAME, WHITE
+
+@functools.lru_cache(maxsize=None)
+def get_font(name, size):
+    """Return a shared font object for a font name and size."""
+    return pygame.font.SysFont(name, size)
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(font, text, color, antialias=True):
+    """Render text once and reuse the surface; least recently used entries are evicted."""
+    return font.render(text, antialias, color)
+
+def text_drawable(key, lines, position, font_size):
+    """Return lines of white text stacked from a position as a (key, rects, draw) entry.
+
+    The key is ``key`` followed by the lines, so the renderer redraws the
+    text only when it changes.
+    """
+    font = get_font(FONT_NAME, font_size)
+    surfaces = [render_text(font, line, WHITE) for line in lines]
+    x, y = position
+    rects = []
+    for surface in surfaces:
+        rects.append(pygame.Rect((x, y), surface.get_size()))
+        y += surface.get_height()
+
+    def draw(target):
+        for surface, rect in zip(surfaces, rects):
+            target.blit(surface, rect)
+    return (key + tuple(lines), rects, draw)
@@ -0,0 +1,87 @@
+# fov.py
+
+from settings import VISION_RADIUS, FOV_CACHE_SIZE
+
+# Each quadrant maps (depth, column) to a world offset: depth grows away
+# from the observer, columns run across the row
+QUADRANTS = (
+    lambda depth, col: (col, -depth),   # north
+    lambda depth, col: (depth, col),    # east
+    lambda depth, col: (col, depth),    # south
+    lambda depth, col: (-depth, col),   # west
+)
+
+def shadowcast(x, y, radius, is_opaque, cols, rows):
+    """Return the set of cells visible from (x, y) within a radius.
+
+    Symmetric shadowcasting: each quadrant is scanned row by row outwards,
+    and an opaque cell narrows the range of slopes still visible behind
+    it. Slopes are kept as integer fractions, so no cell is lost or gained
+    to rounding. Opaque cells are visible themselves; cells off the grid
+    block sight.
+    """
+    visible = {(x, y)}
+    limit = radius * radius
+    for transform in QUADRANTS:
+        # Rows still to scan: depth and the start and end slopes as n / d
+        rows_left = [(1, -1, 1, 1, 1)]
+        while rows_left:
+            depth, start_n, start_d, end_n, end_d = rows_left.pop()
+            if depth > radius:
+                continue
+            # Columns whose centre lies within the slopes, rounding ties outwards
+            first = (2 * depth * start_n + start_d) // (2 * start_d)
+            last = -((end_d - 2 * depth * end_n) // (2 * end_d))
+            previous = None  # None, or whether the previous cell was opaque
+            for col in range(first, last + 1):
+                dx, dy = transform(depth, col)
+                cx, cy = x + dx, y + dy
+                inside = 0 <= cx < cols and 0 <= cy < rows
+                opaque = not inside or is_opaque(cx, cy)
+                if inside and col * col + depth * depth <= limit and (
+                    opaque
+                    or (col * start_d >= depth * start_n and col * end_d <= depth * end_n)
+                ):
+                    visible.add((cx, cy))
+                if previous and not opaque:
+                    start_n, start_d = 2 * col - 1, 2 * depth
+                if previous is False and opaque:
+                    rows_left.append((depth + 1, start_n, start_d, 2 * col - 1, 2 * depth))
+                previous = opaque
+            if previous is False:
+                rows_left.append((depth + 1, start_n, start_d, end_n, end_d))
+    return visible
+
+class FieldOfView:
+    """Cached line of sight over a ``ChunkedGrid`` where characters block sight.
+
+    Results are cached per observer position together with the versions of
+    the grid chunks within sight range. A cached field stays valid until
+    something enters, leaves or moves inside those chunks, so an observer
+    far from any movement is never recomputed, however large the map.
+    """
+
+    def __init__(self, grid, radius=VISION_RADIUS, cache_size=FOV_CACHE_SIZE):
+        self.grid = grid
+        self.radius = radius
+        self.cache_size = cache_size
+        self.cache = {}
+
+    def visible_from(self, x, y):
+        """Return the frozenset of cells visible from a cell."""
+        r = self.radius
+        stamp = self.grid.region_version(x - r, y - r, x + r + 1, y + r + 1)
+        cached = self.cache.pop((x, y), None)
+        if cached is None or cached[0] != stamp:
+            grid = self.grid
+            occupied = grid.cells
+            cells = frozenset(shadowcast(
+                x, y, r, lambda cx, cy: (cx, cy) in occupied, grid.cols, grid.rows
+            ))
+            cached = (stamp, cells)
+            if len(self.cache) >= self.cache_size:
+                # Dicts keep insertion order and hits are re-inserted below,
+                # so the first key is the least recently used
+                del self.cache[next(iter(self.cache))]
+        self.cache[(x, y)] = cached
+        return cached[1]
@@ -1,42 +1,91 @@
 # main.py
 
-import pygame
+import argparse
+import os
 import sys
-import random
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+import pygame
 from settings import *
-from character import Character
-from weapons import (
-    Bullet, Arrow, cast_spell, place_mine, check_mines, draw_mines, fire_laser
-)
 from buttons import Button
-from effects import SpellEffect, LaserEffect
-from utils import draw_grid, remove_dead_characters
+from fonts import get_font, render_text
+from simulation import Simulation, WEAPONS
+from registry import REGISTRY
+from renderer import Renderer
+from camera import Camera
+from replay import ReplayWriter
+from snapshot import save_snapshot, load_snapshot
+from profiler import FrameProfiler, ProfilerOverlay, NULL_PROFILER
+from combat import CombatLog, ScreenLog, open_sink
 
 def main():
     """Main function to run the game."""
+    parser = argparse.ArgumentParser(description="Simple Roguelike")
+    parser.add_argument('--record', metavar='PATH', help="record the game to a replay file")
+    parser.add_argument('--cols', type=int, default=WORLD_COLS, help="world width in cells")
+    parser.add_argument('--rows', type=int, default=WORLD_ROWS, help="world height in cells")
+    parser.add_argument('--fog', action='store_true', default=FOG_OF_WAR,
+                        help="hide enemies out of line of sight; unseen enemies hold still")
+    parser.add_argument('--waves', type=int, default=WAVES,
+                        help="waves of enemies to follow the first ones")
+    parser.add_argument('--autosave', metavar='PATH',
+                        help="save a snapshot of the game after every turn")
+    parser.add_argument('--resume', metavar='PATH', help="continue a saved snapshot")
+    parser.add_argument('--combat-log', metavar='PATH',
+                        help="write every hit to PATH: '-' for text on stdout, "
+                        ".jsonl for JSON lines, anything else for the binary format")
+    parser.add_argument('--profile', action='store_true',
+                        help="time each frame phase and show an on-screen overlay")
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help="with --profile, write the frame timings as JSON on exit")
+    parser.add_argument('--chrome-trace', metavar='PATH',
+                        help="with --profile, write a Chrome trace on exit")
+    args = parser.parse_args()
+    if args.record and args.resume:
+        # Replays start from a seeded new game, not from a snapshot
+        parser.error("--record cannot be combined with --resume")
+    profiler = FrameProfiler() if args.profile else None
+    screen = init_display()
     clock = pygame.time.Clock()
     game_state = 'tutorial'
     while True:
         if game_state == 'tutorial':
-            game_state = tutorial_screen(clock)
+            game_state = tutorial_screen(screen)
         elif game_state == 'playing':
-            play_game(clock)
+            play_game(
+                screen, clock, args.record, args.cols, args.rows, profiler,
+                args.profile_json, args.chrome_trace, args.autosave, args.resume,
+                args.fog, args.combat_log, args.waves
+            )
             break
         else:
             break
 
-def tutorial_screen(clock):
+def init_display():
+    """Open the game window, starting only the display and font subsystems.
+
+    This is the only place SDL is initialized; importing the game modules
+    has no side effects, and audio and joysticks are never started.
+    """
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(CAPTION)
+    # Nothing reacts to hovering, so don't wake the idle loop for it
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
+    return screen
+
+def tutorial_screen(screen):
     """Displays the tutorial screen."""
-    font = pygame.font.SysFont(FONT_NAME, 18)
+    font = get_font(FONT_NAME, 18)
     start_button = Button(WIDTH//2 - 50, HEIGHT - 70, 100, 40, "Start Game", lambda: None)
+    # The tutorial never changes, so it is drawn once
+    screen.fill(BLACK)
+    draw_tutorial_text(screen, font)
+    start_button.draw(screen)
+    pygame.display.flip()
     running = True
     while running:
-        screen.fill(BLACK)
-        draw_tutorial_text(screen, font)
-        start_button.draw(screen)
-        pygame.display.flip()
-        clock.tick(FPS)
-        running = handle_tutorial_events(start_button)
+        running = handle_tutorial_events(start_button, wait_for_events())
     return 'playing'
 
 def draw_tutorial_text(screen, font):
@@ -45,20 +94,14 @@ def draw_tutorial_text(screen, font):
         "Welcome to the Simple Roguelike Game!",
         "Use arrow keys to move.",
         "Select weapons using the buttons at the bottom.",
-        "Sword: Press SPACE to attack adjacent enemies.",
-        "Gun: Click on a cell to shoot a bullet.",
-        "Bow: Select direction with arrow keys to shoot an arrow.",
-        "Spell: Click on a cell to cast a spell.",
-        "Mine: Click on a cell to place a mine.",
-        "Laser: Press L to fire lasers in all directions.",
-    ]
+    ] + [weapon.help for weapon in REGISTRY if weapon.help]
     for idx, line in enumerate(instructions):
-        text_surf = font.render(line, True, WHITE)
+        text_surf = render_text(font, line, WHITE)
         screen.blit(text_surf, (20, 20 + idx * 25))
 
-def handle_tutorial_events(start_button):
+def handle_tutorial_events(start_button, events):
     """Handle events in the tutorial screen."""
-    for event in pygame.event.get():
+    for event in events:
         if event.type == pygame.QUIT:
             pygame.quit()
             sys.exit()
@@ -67,177 +110,160 @@ def handle_tutorial_events(start_button):
                 return False
     return True
 
-def play_game(clock):
-    """Runs the main game loop."""
-    player, enemies = initialize_characters()
-    bullets, arrows = [], []
-    spell_effects, laser_effects = [], []
-    mines = []
-    weapon_buttons = create_weapon_buttons(player)
-    player_turn = True
-    waiting_for_actions = False
+def play_game(
+    screen, clock, record_path=None, cols=WORLD_COLS, rows=WORLD_ROWS,
+    profiler=None, profile_json=None, chrome_trace=None, autosave=None, resume=None,
+    fog=FOG_OF_WAR, combat_log=None, waves=WAVES
+):
+    """Runs the main game loop, optionally recording, profiling and saving it."""
+    if resume:
+        sim = load_snapshot(resume)
+    else:
+        sim = Simulation(cols=cols, rows=rows, fog=fog, waves=waves)
+    if record_path:
+        sim.recorder = ReplayWriter(
+            record_path, sim.seed, sim.num_enemies, sim.grid.cols, sim.grid.rows,
+            sim.fov is not None, sim.moves, sim.pathfinding, sim.spawner
+        )
+    weapon_buttons = create_weapon_buttons(sim.player)
+    camera = Camera(sim.grid.cols, sim.grid.rows)
+    renderer = Renderer(screen, camera)
+    screen_log = ScreenLog()
+    sinks = [screen_log]
+    if combat_log:
+        sinks.append(open_sink(combat_log))
+    sim.set_log(CombatLog(sinks))
+    renderer.overlays.append(screen_log)
+    if profiler is not None:
+        sim.profiler = renderer.profiler = profiler
+        renderer.overlays.append(ProfilerOverlay(profiler))
+    else:
+        profiler = NULL_PROFILER
+    saved_turn = sim.turn
     running = True
     while running:
-        screen.fill(BLACK)
-        draw_grid(screen)
-        draw_game_elements(
-            screen, player, enemies, bullets, arrows,
-            spell_effects, laser_effects, mines, weapon_buttons
-        )
-        pygame.display.flip()
-        clock.tick(FPS)
-        running, player_turn, waiting_for_actions = handle_events(
-            player, enemies, bullets, arrows, spell_effects,
-            laser_effects, mines, weapon_buttons, player_turn,
-            waiting_for_actions, running
-        )
-        # Update game state and get whether actions are still pending
-        waiting_for_actions = update_game_state(
-            bullets, arrows, spell_effects, laser_effects, mines, enemies
-        )
-        if not waiting_for_actions and not player_turn:
-            handle_enemies_turn(enemies, player)
-            player_turn = True
-        if player.health <= 0 or not enemies:
+        profiler.begin_frame()
+        # Pick up balance edits to weapons.json without restarting; not while
+        # recording, as a replay is re-simulated with the balance it was started with
+        if sim.recorder is None:
+            REGISTRY.reload_if_changed()
+        camera.follow(sim.player.x, sim.player.y)
+        renderer.render(sim, weapon_buttons)
+        if sim.accepts_input():
+            # Nothing moves until the player acts, so sleep until they do
+            with profiler.phase('idle_wait'):
+                events = wait_for_events()
+        else:
+            with profiler.phase('clock.tick'):
+                clock.tick(FPS)
+            events = pygame.event.get()
+        with profiler.phase('handle_events'):
+            running = handle_events(sim, weapon_buttons, camera, running, events)
+        # Advance projectiles and effects; enemies move once they finish
+        sim.tick()
+        if autosave and sim.turn != saved_turn:
+            with profiler.phase('autosave'):
+                save_snapshot(sim, autosave)
+            saved_turn = sim.turn
+        if sim.is_over():
             running = False
+        if profiler.enabled:
+            profiler.end_frame(
+                enemies=len(sim.enemies),
+                projectiles=len(sim.bullets) + len(sim.arrows),
+                effects=len(sim.spell_effects) + len(sim.laser_effects),
+                mines=len(sim.mines),
+            )
+    if sim.recorder is not None:
+        sim.recorder.close()
+    sim.log.close()
+    if profile_json and profiler.enabled:
+        profiler.dump_json(profile_json)
+    if chrome_trace and profiler.enabled:
+        profiler.dump_chrome_trace(chrome_trace)
     pygame.quit()
     sys.exit()
 
-def initialize_characters():
-    """Initialize the player and enemies."""
-    player = Character(COLS // 2, ROWS // 2, BLUE, 10)
-    enemies = create_enemies(player, 5)
-    return player, enemies
-
-def create_enemies(player, num_enemies):
-    """Create a list of enemy characters."""
-    enemies = []
-    for _ in range(num_enemies):
-        x, y = get_random_position(player, enemies)
-        enemies.append(Character(x, y, RED, 5))
-    return enemies
-
-def get_random_position(player, enemies):
-    """Get a random position not occupied by player or enemies."""
-    while True:
-        x = random.randint(0, COLS - 1)
-        y = random.randint(0, ROWS - 1)
-        if not player.is_at(x, y) and all(not e.is_at(x, y) for e in enemies):
-            return x, y
-
 def create_weapon_buttons(player):
     """Create and return a list of weapon buttons."""
     button_width = 80
     button_height = 30
     button_y = HEIGHT - button_height - 10
     button_padding = 5
-    weapon_names = ['Sword', 'Gun', 'Bow', 'Spell', 'Mine', 'Laser']
     weapon_buttons = []
-    for idx, name in enumerate(weapon_names):
+    for idx, name in enumerate(WEAPONS):
         x = button_padding + (button_width + button_padding) * idx
-        button = Button(x, button_y, button_width, button_height, name, lambda n=name: select_weapon(n.lower(), player, weapon_buttons))
+        button = Button(x, button_y, button_width, button_height, REGISTRY[name].label, lambda n=name: select_weapon(n, player, weapon_buttons))
         weapon_buttons.append(button)
-    select_weapon('sword', player, weapon_buttons)
+    select_weapon(player.current_weapon, player, weapon_buttons)
     return weapon_buttons
 
 def select_weapon(weapon_name, player, weapon_buttons):
     """Updates the current weapon and button selection."""
     player.current_weapon = weapon_name
-    for button in weapon_buttons:
-        button.selected = (button.text.lower() == weapon_name)
+    for name, button in zip(WEAPONS, weapon_buttons):
+        button.selected = (name == weapon_name)
 
-def draw_game_elements(
-    screen, player, enemies, bullets, arrows,
-    spell_effects, laser_effects, mines, weapon_buttons
-):
-    """Draw all game elements on the screen."""
-    player.draw(screen)
-    for enemy in enemies:
-        enemy.draw(screen)
-    for bullet in bullets:
-        bullet.draw(screen)
-    for arrow in arrows:
-        arrow.draw(screen)
-    for effect in spell_effects:
-        effect.draw(screen)
-    for effect in laser_effects:
-        effect.draw(screen)
-    draw_mines(screen, mines)
-    for button in weapon_buttons:
-        button.draw(screen)
+def wait_for_events(timeout=IDLE_TIMEOUT):
+    """Block until an event arrives or the timeout passes, then drain the queue."""
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
 
-def handle_events(
-    player, enemies, bullets, arrows, spell_effects,
-    laser_effects, mines, weapon_buttons, player_turn,
-    waiting_for_actions, running
-):
+def handle_events(sim, weapon_buttons, camera, running, events):
     """Handle user input events."""
-    for event in pygame.event.get():
+    for event in events:
         if event.type == pygame.QUIT:
             running = False
-        if player_turn and not waiting_for_actions:
+        if sim.accepts_input():
+            action = None
             if event.type == pygame.MOUSEBUTTONDOWN:
-                if handle_mouse_click(event, player, enemies, bullets, spell_effects, mines, weapon_buttons):
-                    player_turn, waiting_for_actions = False, True
+                action = handle_mouse_click(event, sim.player, weapon_buttons, camera)
             elif event.type == pygame.KEYDOWN:
-                if handle_key_press(event, player, enemies, arrows, laser_effects):
-                    player_turn, waiting_for_actions = False, True
-    return running, player_turn, waiting_for_actions
+                action = handle_key_press(event, sim.player)
+            if action:
+                sim.perform(action)
+    return running
 
-def handle_mouse_click(event, player, enemies, bullets, spell_effects, mines, weapon_buttons):
-    """Handle mouse click events for player actions."""
+def handle_mouse_click(event, player, weapon_buttons, camera):
+    """Translate a mouse click into a player action."""
     mouse_x, mouse_y = event.pos
-    for button in weapon_buttons:
+    for name, button in zip(WEAPONS, weapon_buttons):
         if button.is_clicked((mouse_x, mouse_y)):
             button.callback()
-            return False
-    return handle_weapon_click(player, enemies, bullets, spell_effects, mines, mouse_x, mouse_y)
+            # Passed on to the simulation so replays record the selection
+            return ('select', name)
+    return handle_weapon_click(player, mouse_x, mouse_y, camera)
 
-def handle_weapon_click(player, enemies, bullets, spell_effects, mines, mouse_x, mouse_y):
-    """Handle weapon actions on mouse click."""
-    target_x, target_y = mouse_x // CELL_SIZE, mouse_y // CELL_SIZE
-    if player.current_weapon == 'gun':
-        bullet = Bullet(player.x, player.y, target_x, target_y, speed=5)
-        bullets.append(bullet)
-        return True
-    elif player.current_weapon == 'spell':
-        cast_spell(target_x, target_y, enemies)
-        effect = SpellEffect(
-            x=target_x * CELL_SIZE + CELL_SIZE // 2,
-            y=target_y * CELL_SIZE + CELL_SIZE // 2,
-            radius=2 * CELL_SIZE
-        )
-        spell_effects.append(effect)
-        return True
-    elif player.current_weapon == 'mine':
-        place_mine(target_x, target_y, mines)
-        return True
-    return False
+def handle_weapon_click(player, mouse_x, mouse_y, camera):
+    """Get the weapon action for a click on the grid."""
+    target_x, target_y = camera.to_world(mouse_x, mouse_y)
+    if REGISTRY[player.current_weapon].input == 'click':
+        return (player.current_weapon, target_x, target_y)
+    return None
 
-def handle_key_press(event, player, enemies, arrows, laser_effects):
-    """Handle keypress events for player actions."""
-    if event.key == pygame.K_SPACE and player.current_weapon == 'sword':
-        player.attack_with_sword(enemies)
-        return True
-    elif player.current_weapon == 'bow':
-        return handle_bow(event, player, arrows)
-    elif player.current_weapon == 'laser' and event.key == pygame.K_l:
-        paths = []
-        fire_laser(player, enemies, paths)
-        effect = LaserEffect(paths)
-        laser_effects.append(effect)
-        return True
-    else:
-        return handle_movement(event, player, enemies)
+def handle_key_press(event, player):
+    """Translate a keypress into a player action."""
+    weapon = REGISTRY[player.current_weapon]
+    return KEY_HANDLERS[weapon.input](event, weapon)
 
-def handle_bow(event, player, arrows):
-    """Handle bow shooting direction."""
+def handle_weapon_key(event, weapon):
+    """Use a weapon bound to a key; other keys move the player."""
+    if event.key == pygame.key.key_code(weapon.key):
+        return (weapon.name,)
+    return handle_movement(event)
+
+def handle_direction_key(event, weapon):
+    """Handle shooting direction for an aimed weapon such as the bow."""
     direction = get_direction_from_key(event.key)
     if direction:
-        arrow = Arrow(player.x, player.y, direction, speed=3, range_limit=15)
-        arrows.append(arrow)
-        return True
-    return False
+        return (weapon.name,) + direction
+    return None
+
+def handle_click_weapon_key(event, weapon):
+    """Click weapons fire with the mouse, so keys only move the player."""
+    return handle_movement(event)
 
 def get_direction_from_key(key):
     """Get shooting direction from key press."""
@@ -251,13 +277,12 @@ def get_direction_from_key(key):
         return (0, 1)
     return None
 
-def handle_movement(event, player, enemies):
+def handle_movement(event):
     """Handle player movement."""
     dx, dy = get_movement_from_key(event.key)
     if dx != 0 or dy != 0:
-        player.move(dx, dy, enemies)
-        return True
-    return False
+        return ('move', dx, dy)
+    return None
 
 def get_movement_from_key(key):
     """Get movement direction from key press."""
@@ -271,48 +296,12 @@ def get_movement_from_key(key):
         return 0, 1
     return 0, 0
 
-def update_game_state(
-    bullets, arrows, spell_effects, laser_effects, mines, enemies
-):
-    """Update bullets, arrows, and spell effects."""
-    update_projectiles(bullets, enemies)
-    update_projectiles(arrows, enemies)
-    update_effects(spell_effects)
-    update_effects(laser_effects)
-    check_mines(mines, enemies)
-    enemies[:] = remove_dead_characters(enemies)
-    # Check if there are any actions still in progress
-    waiting_for_actions = (
-        bool(bullets) or bool(arrows) or bool(spell_effects) or bool(laser_effects)
-    )
-    return waiting_for_actions
-
-def update_projectiles(projectiles, enemies):
-    """Update projectiles and remove finished ones."""
-    for proj in projectiles[:]:
-        proj.update(enemies)
-        if proj.is_finished():
-            projectiles.remove(proj)
-
-def update_effects(effects):
-    """Update effects and remove finished ones."""
-    for effect in effects[:]:
-        effect.update()
-        if effect.is_finished():
-            effects.remove(effect)
-
-def handle_enemies_turn(enemies, player):
-    """Handle the enemies' turn."""
-    for enemy in enemies:
-        dx, dy = get_enemy_movement(enemy, player)
-        others = [player] + [e for e in enemies if e != enemy]
-        enemy.move(dx, dy, others)
-
-def get_enemy_movement(enemy, player):
-    """Determine enemy movement towards the player."""
-    dx = 1 if enemy.x < player.x else -1 if enemy.x > player.x else 0
-    dy = 1 if enemy.y < player.y else -1 if enemy.y > player.y else 0
-    return dx, dy
+# Keypress handling for each weapon input type in weapons.json
+KEY_HANDLERS = {
+    'key': handle_weapon_key,
+    'direction': handle_direction_key,
+    'click': handle_click_weapon_key,
+}
 
 if __name__ == "__main__":
     main()
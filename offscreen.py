@@ -0,0 +1,258 @@
+# offscreen.py
+
+import argparse
+import os
+import shlex
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from settings import WIDTH, HEIGHT
+from replay import Replay
+
+THUMBNAIL_SIZE = (150, 150)
+
+def init_offscreen():
+    """Start pygame's display and fonts on SDL's dummy driver; no window opens."""
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    import pygame
+    if not pygame.display.get_init():
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        pygame.display.init()
+    if not pygame.font.get_init():
+        pygame.font.init()
+
+class FrameRenderer:
+    """Draws the state of one simulation onto an offscreen surface.
+
+    Uses the game's dirty-rect ``Renderer``, so consecutive frames of the
+    same game only redraw what changed, and follows the player with a
+    camera like the live window.
+    """
+
+    def __init__(self, sim):
+        import pygame
+        from camera import Camera
+        from renderer import Renderer
+        from main import create_weapon_buttons, select_weapon
+        self.sim = sim
+        self.select_weapon = select_weapon
+        self.surface = pygame.Surface((WIDTH, HEIGHT))
+        self.camera = Camera(sim.grid.cols, sim.grid.rows)
+        self.renderer = Renderer(self.surface, self.camera)
+        self.changed = True
+        self.buttons = create_weapon_buttons(sim.player)
+
+    def draw(self):
+        """Bring the surface up to date with the simulation and return it.
+
+        ``changed`` tells whether the frame differs from the previous one.
+        """
+        player = self.sim.player
+        self.select_weapon(player.current_weapon, player, self.buttons)
+        self.camera.follow(player.x, player.y)
+        self.changed = bool(self.renderer.draw_changes(self.sim, self.buttons))
+        return self.surface
+
+def action_frames(sim, action):
+    """Apply one action, yielding the simulation after every frame it takes.
+
+    Like the live loop, an action is followed by one tick per frame until
+    the enemies have moved; a weapon selection is a single frame.
+    """
+    if not sim.perform(action):
+        yield sim
+        return
+    while not sim.player_turn:
+        sim.tick()
+        yield sim
+
+def play_frames(sim, actions):
+    """Yield the simulation at its first frame and after every later one."""
+    yield sim
+    for action in actions:
+        yield from action_frames(sim, action)
+
+def frame_offsets(replay):
+    """Return the number of the first frame of every action, and the total.
+
+    Runs the replay headless, which is far cheaper than drawing it, so the
+    frames can be split between workers that each number theirs correctly.
+    """
+    sim = replay.seek(0)
+    offsets = []
+    count = 1  # the initial state
+    for action in replay.actions():
+        offsets.append(count)
+        count += sum(1 for _ in action_frames(sim, action))
+    return offsets, count
+
+def save_frames(frames, directory, first_frame=0, every=1, extension='png'):
+    """Save every ``every``-th frame as a numbered image; return how many.
+
+    Encoding dominates the cost, so a frame identical to the one before
+    is copied from that file instead of encoded again.
+    """
+    import pygame
+    saved = 0
+    renderer = None
+    previous = None
+    for number, sim in enumerate(frames, first_frame):
+        if number % every:
+            continue
+        if renderer is None:
+            renderer = FrameRenderer(sim)
+        path = os.path.join(directory, f"frame_{number // every:06d}.{extension}")
+        surface = renderer.draw()
+        if renderer.changed or previous is None:
+            pygame.image.save(surface, path)
+        else:
+            shutil.copyfile(previous, path)
+        previous = path
+        saved += 1
+    return saved
+
+def _render_chunk(path, start, stop, first_frame, directory, every, extension):
+    """Render the frames of actions ``start`` to ``stop`` of a replay."""
+    replay = Replay(path)
+    sim = replay.seek(start)
+    actions = replay.actions(start, stop)
+    if start == 0:
+        frames = play_frames(sim, actions)
+    else:
+        frames = (frame for action in actions for frame in action_frames(sim, action))
+    return save_frames(frames, directory, first_frame, every, extension)
+
+def render_replay_frames(path, directory, every=1, workers=None, extension='png'):
+    """Render a replay to numbered image frames across worker processes.
+
+    The actions are split into contiguous chunks; each worker seeks the
+    replay to its chunk and saves that chunk's frames. Returns the number
+    of frames written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    replay = Replay(path)
+    offsets, _ = frame_offsets(replay)
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, -(-replay.length // (workers * 4)))
+    bounds = list(range(0, replay.length, chunk)) or [0]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_offscreen) as pool:
+        futures = [
+            pool.submit(
+                _render_chunk, path, start, start + chunk,
+                0 if start == 0 else offsets[start], directory, every,
+                extension
+            )
+            for start in bounds
+        ]
+        return sum(future.result() for future in futures)
+
+def encoder_command(output, fps=30):
+    """Default ffmpeg command reading raw RGB frames from stdin."""
+    return [
+        'ffmpeg', '-loglevel', 'error', '-y',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{WIDTH}x{HEIGHT}",
+        '-r', str(fps), '-i', '-', '-pix_fmt', 'yuv420p', output,
+    ]
+
+def encode_replay(path, command, every=1):
+    """Pipe a replay's frames as raw RGB24 to an encoder; return the count.
+
+    Frames are written in order as they are drawn, so this runs in one
+    process; the encoder works concurrently on the other end of the pipe.
+    """
+    import pygame
+    replay = Replay(path)
+    frames = play_frames(replay.seek(0), replay.actions())
+    process = subprocess.Popen(command, stdin=subprocess.PIPE)
+    written = 0
+    renderer = None
+    try:
+        for number, sim in enumerate(frames):
+            if number % every:
+                continue
+            if renderer is None:
+                renderer = FrameRenderer(sim)
+            process.stdin.write(pygame.image.tobytes(renderer.draw(), 'RGB'))
+            written += 1
+    finally:
+        process.stdin.close()
+        process.wait()
+    if process.returncode:
+        raise RuntimeError(f"Encoder exited with status {process.returncode}")
+    return written
+
+def render_thumbnail(path, output, size=THUMBNAIL_SIZE, at=None):
+    """Save a scaled image of a replay after ``at`` actions, or at its end."""
+    import pygame
+    replay = Replay(path)
+    sim = replay.seek(replay.length if at is None else at)
+    image = pygame.transform.smoothscale(FrameRenderer(sim).draw(), size)
+    pygame.image.save(image, output)
+    return output
+
+def render_thumbnails(paths, directory, size=THUMBNAIL_SIZE, workers=None):
+    """Thumbnail the final state of many replays, one per worker task."""
+    os.makedirs(directory, exist_ok=True)
+    outputs = [
+        os.path.join(directory, os.path.splitext(os.path.basename(path))[0] + '.png')
+        for path in paths
+    ]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_offscreen) as pool:
+        sizes = [size] * len(paths)
+        return list(pool.map(render_thumbnail, paths, outputs, sizes, chunksize=16))
+
+def main():
+    """Render replays offscreen from the command line."""
+    parser = argparse.ArgumentParser(description="Render recorded games without a window.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    frames = commands.add_parser('frames', help="write numbered image frames")
+    frames.add_argument('replay')
+    frames.add_argument('directory')
+    frames.add_argument('--format', choices=('png', 'bmp', 'tga', 'jpg'), default='png',
+                        help="image format; BMP and TGA encode several times faster")
+    frames.add_argument('--every', type=int, default=1, help="keep every Nth frame")
+    frames.add_argument('--workers', type=int, help="processes (default: all cores)")
+    video = commands.add_parser('video', help="pipe raw frames to an encoder")
+    video.add_argument('replay')
+    video.add_argument('output', nargs='?', help="video file for the default ffmpeg command")
+    video.add_argument('--fps', type=int, default=30)
+    video.add_argument('--every', type=int, default=1, help="keep every Nth frame")
+    video.add_argument('--encoder', help="command reading raw RGB24 "
+                       f"{WIDTH}x{HEIGHT} frames from stdin (default: ffmpeg)")
+    thumbs = commands.add_parser('thumbnails', help="one image per replay")
+    thumbs.add_argument('directory')
+    thumbs.add_argument('replays', nargs='+')
+    thumbs.add_argument('--size', type=int, nargs=2, default=THUMBNAIL_SIZE,
+                        metavar=('WIDTH', 'HEIGHT'))
+    thumbs.add_argument('--workers', type=int, help="processes (default: all cores)")
+    args = parser.parse_args()
+
+    if args.command == 'video':
+        if args.encoder:
+            command = shlex.split(args.encoder)
+        elif args.output:
+            command = encoder_command(args.output, args.fps)
+        else:
+            parser.error("video needs an output file or --encoder")
+
+    start = time.perf_counter()
+    if args.command == 'frames':
+        count = render_replay_frames(
+            args.replay, args.directory, args.every, args.workers, args.format
+        )
+        what = f"{count} frames"
+    elif args.command == 'video':
+        init_offscreen()
+        count = encode_replay(args.replay, command, args.every)
+        what = f"{count} frames"
+    else:
+        count = len(render_thumbnails(
+            args.replays, args.directory, tuple(args.size), args.workers
+        ))
+        what = f"{count} thumbnails"
+    elapsed = time.perf_counter() - start
+    print(f"{what} in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
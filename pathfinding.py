@@ -0,0 +1,182 @@
+# pathfinding.py
+
+from array import array
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the array-backed BFS is used instead
+    np = None
+
+# Enemies may step diagonally, so the field uses 8-connected neighbours
+NEIGHBORS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+class DistanceField:
+    """Breadth-first step counts from every cell to a goal cell.
+
+    The field is computed once per turn from the player's position and then
+    read by every enemy, so an enemy turn costs one BFS plus O(1) per enemy.
+    With ``max_distance`` the search is limited to a window around the goal;
+    cells outside it report a distance of -1.
+
+    The search does not pass through ``blocked`` cells and never steps onto
+    one. A character standing on a blocked cell (such as an enemy that is
+    itself in other enemies' way) counts as one step further than its
+    nearest reached neighbour, so it still finds its way.
+    """
+
+    def __init__(self, cols, rows, goal_x, goal_y, blocked=(), max_distance=None):
+        self.goal_x = goal_x
+        self.goal_y = goal_y
+        if max_distance is None:
+            self.x0, self.y0 = 0, 0
+            x1, y1 = cols, rows
+        else:
+            self.x0 = max(0, goal_x - max_distance)
+            self.y0 = max(0, goal_y - max_distance)
+            x1 = min(cols, goal_x + max_distance + 1)
+            y1 = min(rows, goal_y + max_distance + 1)
+        self.width = x1 - self.x0
+        self.height = y1 - self.y0
+        blocked = [
+            (x - self.x0, y - self.y0) for x, y in blocked
+            if self.x0 <= x < x1 and self.y0 <= y < y1
+        ]
+        if np is not None:
+            self.array = self._bfs_numpy(goal_x - self.x0, goal_y - self.y0, blocked)
+            self.distances = self.array.ravel().tolist()
+        else:
+            self.array = None
+            self.distances = self._bfs_array(goal_x - self.x0, goal_y - self.y0, blocked)
+        # Distances of the blocked cells, for characters standing on them
+        self.blocked = {}
+        for bx, by in blocked:
+            nearest = -1
+            for dx, dy in NEIGHBORS:
+                candidate = self.distance(bx + self.x0 + dx, by + self.y0 + dy)
+                if candidate >= 0 and (nearest < 0 or candidate < nearest):
+                    nearest = candidate
+            if nearest >= 0:
+                self.blocked[(bx + self.x0, by + self.y0)] = nearest + 1
+
+    def _bfs_array(self, gx, gy, blocked):
+        """Run the BFS over a flat integer array."""
+        width, height = self.width, self.height
+        distances = array('i', [-1]) * (width * height)
+        for bx, by in blocked:
+            distances[by * width + bx] = -2
+        distances[gy * width + gx] = 0
+        queue = deque([(gx, gy)])
+        while queue:
+            x, y = queue.popleft()
+            next_distance = distances[y * width + x] + 1
+            for dx, dy in NEIGHBORS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    index = ny * width + nx
+                    if distances[index] == -1:
+                        distances[index] = next_distance
+                        queue.append((nx, ny))
+        for bx, by in blocked:
+            distances[by * width + bx] = -1
+        return distances
+
+    def _bfs_numpy(self, gx, gy, blocked):
+        """Run the BFS as whole-array wavefront expansions."""
+        distances = np.full((self.height, self.width), -1, dtype=np.int32)
+        passable = np.ones((self.height, self.width), dtype=bool)
+        for bx, by in blocked:
+            passable[by, bx] = False
+        frontier = np.zeros((self.height + 2, self.width + 2), dtype=bool)
+        frontier[gy + 1, gx + 1] = True
+        distances[gy, gx] = 0
+        unvisited = passable & (distances < 0)
+        step = 0
+        while True:
+            step += 1
+            grown = np.zeros((self.height, self.width), dtype=bool)
+            for dx, dy in NEIGHBORS:
+                grown |= frontier[1 + dy:self.height + 1 + dy, 1 + dx:self.width + 1 + dx]
+            grown &= unvisited
+            if not grown.any():
+                break
+            distances[grown] = step
+            unvisited &= ~grown
+            frontier[1:-1, 1:-1] = grown
+        return distances
+
+    def distance(self, x, y):
+        """Return the step count from a cell to the goal, or -1."""
+        lx, ly = x - self.x0, y - self.y0
+        if 0 <= lx < self.width and 0 <= ly < self.height:
+            return self.distances[ly * self.width + lx]
+        return -1
+
+    def next_step(self, x, y):
+        """Return the (dx, dy) step that brings a cell closest to the goal.
+
+        Among equally short steps the straight-line direction wins, so on
+        open ground enemies walk exactly as they did before. Returns None
+        for cells the field does not reach.
+        """
+        current = self.distance(x, y)
+        if current < 0:
+            current = self.blocked.get((x, y), -1)
+        if current < 0:
+            return None
+        sx = (self.goal_x > x) - (self.goal_x < x)
+        sy = (self.goal_y > y) - (self.goal_y < y)
+        if current == 0 or self.distance(x + sx, y + sy) == current - 1:
+            return sx, sy
+        best, best_distance = (0, 0), current
+        for dx, dy in NEIGHBORS:
+            candidate = self.distance(x + dx, y + dy)
+            if 0 <= candidate < best_distance:
+                best, best_distance = (dx, dy), candidate
+        return best
+
+    def next_steps(self, characters):
+        """Return the next step for every character in one batch.
+
+        Characters the field does not reach get None, like ``next_step``.
+        """
+        if self.array is None or len(characters) < 32:
+            return [self.next_step(c.x, c.y) for c in characters]
+        xs = np.fromiter((c.x for c in characters), dtype=np.int64, count=len(characters))
+        ys = np.fromiter((c.y for c in characters), dtype=np.int64, count=len(characters))
+        lx, ly = xs - self.x0, ys - self.y0
+        inside = (lx >= 0) & (lx < self.width) & (ly >= 0) & (ly < self.height)
+        # Pad so neighbour lookups never leave the array; padding is "unreached"
+        padded = np.full((self.height + 2, self.width + 2), -1, dtype=np.int32)
+        padded[1:-1, 1:-1] = self.array
+        px = np.where(inside, lx, -1) + 1
+        py = np.where(inside, ly, -1) + 1
+        current = padded[py, px]
+        if self.blocked:
+            blocked = self.blocked
+            current = np.fromiter(
+                (blocked.get((c.x, c.y), d) for c, d in zip(characters, current.tolist())),
+                dtype=np.int32, count=len(characters)
+            )
+        offsets = np.array(NEIGHBORS, dtype=np.int64)
+        around = padded[py[:, None] + offsets[:, 1], px[:, None] + offsets[:, 0]]
+        around = np.where(around < 0, np.iinfo(np.int32).max, around)
+        best = around.argmin(axis=1)
+        best_distance = around[np.arange(len(characters)), best]
+        sx = np.sign(self.goal_x - xs)
+        sy = np.sign(self.goal_y - ys)
+        # Prefer the straight-line step whenever it is also a shortest step
+        greedy = (sy + 1) * 3 + (sx + 1)
+        greedy = np.where(greedy > 4, greedy - 1, greedy)
+        moving = (sx != 0) | (sy != 0)
+        greedy_distance = around[np.arange(len(characters)), np.where(moving, greedy, 0)]
+        use_greedy = moving & (greedy_distance == current - 1)
+        choice = np.where(use_greedy, greedy, best)
+        dx = np.where(best_distance < current, offsets[choice, 0], 0)
+        dy = np.where(best_distance < current, offsets[choice, 1], 0)
+        dx = np.where(use_greedy, sx, dx)
+        dy = np.where(use_greedy, sy, dy)
+        steps = list(zip(dx.tolist(), dy.tolist()))
+        for index in np.flatnonzero(current < 0).tolist():
+            steps[index] = None
+        return steps
@@ -0,0 +1,54 @@
+# pools.py
+
+class EntityPool:
+    """Live bullets, arrows or effects of one type, with object reuse.
+
+    Finished entities are removed by swapping in the last live entity, which
+    is O(1) instead of ``list.remove``'s O(n), and parked on a free list.
+    ``spawn`` hands a parked entity back out through its ``reset`` method,
+    so allocation stays flat however many shots are in flight.
+    """
+
+    def __init__(self, entity_type):
+        self.entity_type = entity_type
+        self.active = []
+        self.free = []
+
+    def spawn(self, *args, **kwargs):
+        """Add an entity, reusing a finished one when available."""
+        if self.free:
+            entity = self.free.pop()
+            entity.reset(*args, **kwargs)
+        else:
+            entity = self.entity_type(*args, **kwargs)
+        self.active.append(entity)
+        return entity
+
+    def update(self, *args):
+        """Update every live entity and recycle the finished ones.
+
+        Returns True if any entity's ``update`` did, such as a projectile
+        that hit an enemy.
+        """
+        active = self.active
+        hit = False
+        index = 0
+        while index < len(active):
+            entity = active[index]
+            if entity.update(*args):
+                hit = True
+            if entity.is_finished():
+                self.free.append(entity)
+                last = active.pop()
+                if last is not entity:
+                    # The swapped-in entity is updated on the next pass
+                    active[index] = last
+                continue
+            index += 1
+        return hit
+
+    def __iter__(self):
+        return iter(self.active)
+
+    def __len__(self):
+        return len(self.active)
@@ -0,0 +1,190 @@
+# profiler.py
+
+import time
+from collections import deque
+
+class _Phase:
+    """Context manager that times one named phase into the current frame."""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        self.profiler.current.append((self.name, self.start, end - self.start))
+
+class _NullPhase:
+    """Phase that records nothing, used while profiling is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+NULL_PHASE = _NullPhase()
+
+class NullProfiler:
+    """Stand-in with the FrameProfiler interface that costs next to nothing."""
+
+    enabled = False
+
+    def phase(self, name):
+        return NULL_PHASE
+
+    def begin_frame(self):
+        pass
+
+    def end_frame(self, **counts):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+class FrameProfiler:
+    """Records per-phase frame timings into a ring buffer.
+
+    Wrap each phase of a frame in ``with profiler.phase(name):`` between
+    ``begin_frame()`` and ``end_frame(**entity_counts)``. Only the last
+    ``capacity`` frames are kept.
+    """
+
+    enabled = True
+
+    def __init__(self, capacity=600):
+        self.frames = deque(maxlen=capacity)
+        self.phases = {}
+        self.current = []
+        self.frame_start = 0.0
+        self.origin = time.perf_counter()
+
+    def phase(self, name):
+        """Return the timer for a phase; phases are reused between frames."""
+        timer = self.phases.get(name)
+        if timer is None:
+            timer = self.phases[name] = _Phase(self, name)
+        return timer
+
+    def begin_frame(self):
+        """Start timing a new frame."""
+        self.current = []
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self, **counts):
+        """Finish the frame, storing its phases and entity counts."""
+        end = time.perf_counter()
+        self.frames.append({
+            'start': self.frame_start - self.origin,
+            'duration': end - self.frame_start,
+            'phases': [
+                (name, start - self.origin, duration)
+                for name, start, duration in self.current
+            ],
+            'counts': counts,
+        })
+
+    def summary(self):
+        """Return FPS, frame-time percentiles and per-phase mean times in ms."""
+        frames = list(self.frames)
+        if not frames:
+            return {'frames': 0}
+        durations = sorted(frame['duration'] for frame in frames)
+        elapsed = frames[-1]['start'] + frames[-1]['duration'] - frames[0]['start']
+        totals = {}
+        for frame in frames:
+            for name, _, duration in frame['phases']:
+                totals[name] = totals.get(name, 0.0) + duration
+        return {
+            'frames': len(frames),
+            'fps': len(frames) / elapsed if elapsed > 0 else 0.0,
+            'frame_ms': {
+                'p50': _percentile(durations, 50) * 1000,
+                'p95': _percentile(durations, 95) * 1000,
+                'p99': _percentile(durations, 99) * 1000,
+                'max': durations[-1] * 1000,
+            },
+            'phase_mean_ms': {
+                name: total / len(frames) * 1000 for name, total in totals.items()
+            },
+            'counts': frames[-1]['counts'],
+        }
+
+    def dump_json(self, path):
+        """Write the summary and every buffered frame as JSON."""
+        import json
+        with open(path, 'w') as file:
+            json.dump({'summary': self.summary(), 'frames': list(self.frames)}, file)
+
+    def dump_chrome_trace(self, path):
+        """Write the buffered frames in Chrome's trace event format.
+
+        Open the file in chrome://tracing or https://ui.perfetto.dev.
+        """
+        import json
+        events = []
+        for frame in self.frames:
+            events.append({
+                'name': 'frame', 'ph': 'X', 'pid': 0, 'tid': 0,
+                'ts': frame['start'] * 1e6, 'dur': frame['duration'] * 1e6,
+                'args': frame['counts'],
+            })
+            for name, start, duration in frame['phases']:
+                events.append({
+                    'name': name, 'ph': 'X', 'pid': 0, 'tid': 0,
+                    'ts': start * 1e6, 'dur': duration * 1e6,
+                })
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class ProfilerOverlay:
+    """On-screen FPS, frame-time percentiles and entity counts.
+
+    The text is refreshed every ``interval`` seconds, so the overlay only
+    makes the renderer redraw its corner a few times per second.
+    """
+
+    def __init__(self, profiler, position=(5, 5), interval=0.5, font_size=18):
+        self.profiler = profiler
+        self.position = position
+        self.interval = interval
+        self.font_size = font_size
+        self.lines = ()
+        self.refreshed = 0.0
+
+    def refresh(self):
+        """Rebuild the text lines if the refresh interval has passed."""
+        now = time.perf_counter()
+        if now - self.refreshed < self.interval:
+            return
+        self.refreshed = now
+        summary = self.profiler.summary()
+        if not summary['frames']:
+            return
+        frame_ms = summary['frame_ms']
+        counts = ' '.join(f"{name}:{count}" for name, count in summary['counts'].items())
+        self.lines = (
+            f"FPS {summary['fps']:.0f}",
+            f"frame p50 {frame_ms['p50']:.2f} p95 {frame_ms['p95']:.2f} "
+            f"p99 {frame_ms['p99']:.2f} ms",
+            counts,
+        )
+
+    def drawable(self):
+        """Return the overlay as a (key, rects, draw) entry for the renderer."""
+        from fonts import text_drawable
+        self.refresh()
+        return text_drawable(('overlay',), self.lines, self.position, self.font_size)
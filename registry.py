@@ -0,0 +1,170 @@
+# registry.py
+
+import json
+import math
+import os
+import struct
+from settings import WEAPONS_FILE
+
+# How a weapon is used: a dedicated key, a click on a target cell, or an
+# arrow key giving the direction
+INPUTS = ('key', 'click', 'direction')
+# The fields a running game can pick up from an edited file; names, order,
+# inputs and keys are fixed once the buttons and action table are built
+BALANCE = ('damage', 'speed', 'range', 'radius', 'stencil')
+
+# Weapon table stored in replay and snapshot headers: its size and the
+# number of weapons, then per weapon its null-terminated name and stats
+TABLE = struct.Struct('<HB')
+STATS = struct.Struct('<Biiid')  # input, damage, speed, range (-1 for none), radius
+
+class WeaponDef:
+    """Balance and input data for one weapon."""
+
+    __slots__ = (
+        'name', 'label', 'input', 'key', 'damage', 'speed', 'range',
+        'radius', 'stencil', 'help'
+    )
+
+    def __init__(self, name, data):
+        self.name = name
+        self.label = data.get('label', name.capitalize())
+        self.input = data['input']
+        if self.input not in INPUTS:
+            raise ValueError(f"{name}: unknown input {self.input!r}")
+        self.key = data.get('key')
+        if self.input == 'key' and not self.key:
+            raise ValueError(f"{name}: key input needs a 'key'")
+        self.damage = int(data['damage'])
+        self.speed = int(data.get('speed', 1))
+        self.range = data.get('range')
+        self.radius = data.get('radius', 0)
+        self.stencil = area_stencil(self.radius)
+        self.help = data.get('help', '')
+
+    def __repr__(self):
+        return f"WeaponDef({self.name!r}, damage={self.damage})"
+
+def area_stencil(radius):
+    """Offsets of the cells within a Euclidean radius of a centre cell."""
+    reach = int(radius)
+    return tuple(
+        (dx, dy)
+        for dy in range(-reach, reach + 1)
+        for dx in range(-reach, reach + 1)
+        if math.hypot(dx, dy) <= radius
+    )
+
+class WeaponRegistry:
+    """Weapon definitions loaded from a JSON file, reloadable while running.
+
+    Weapons keep the order of the file, which is also the order of the
+    weapon buttons and of the replay opcodes. Damage, speeds, ranges and
+    area stencils are read from here at the moment they are used, so a
+    reload takes effect on the next shot. A reload only changes those
+    balance fields; an edit that adds, removes, reorders or rebinds a
+    weapon is rejected until restart.
+    """
+
+    def __init__(self, path=WEAPONS_FILE):
+        self.path = path
+        self.mtime = None
+        self.weapons = {}
+        self.names = ()
+        self.load()
+
+    def load(self):
+        """Read the file and replace every definition."""
+        self.mtime = os.stat(self.path).st_mtime_ns
+        self.weapons = self.read()
+        self.names = tuple(self.weapons)
+
+    def read(self):
+        """Parse the file into definitions by name."""
+        with open(self.path) as file:
+            data = json.load(file)
+        return {name: WeaponDef(name, entry) for name, entry in data.items()}
+
+    def update_balance(self, weapons):
+        """Copy the balance fields of new definitions onto the current ones.
+
+        Raises ValueError, changing nothing, if the new definitions do not
+        have the same weapons in the same order with the same inputs.
+        """
+        if tuple(weapons) != self.names:
+            raise ValueError(
+                f"weapons changed from {list(self.names)} to {list(weapons)}; restart to apply"
+            )
+        for name, weapon in weapons.items():
+            current = self.weapons[name]
+            if (weapon.input, weapon.key) != (current.input, current.key):
+                raise ValueError(f"{name}: input changed; restart to apply")
+        for name, weapon in weapons.items():
+            current = self.weapons[name]
+            for field in BALANCE:
+                setattr(current, field, getattr(weapon, field))
+
+    def reload_if_changed(self):
+        """Reload the file if it changed on disk; return True if it did.
+
+        Only the balance fields are updated. A file that fails to load, or
+        that changes which weapons exist or how they are used, keeps the
+        current definitions, so an edit cannot crash a running game.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        # Remember the attempt so a broken file is reported only once
+        self.mtime = mtime
+        try:
+            self.update_balance(self.read())
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            print(f"Could not reload {self.path}: {error}")
+            return False
+        print(f"Reloaded weapons from {self.path}")
+        return True
+
+    def __getitem__(self, name):
+        return self.weapons[name]
+
+    def __contains__(self, name):
+        return name in self.weapons
+
+    def __iter__(self):
+        return iter(self.weapons.values())
+
+    def __len__(self):
+        return len(self.weapons)
+
+def encode_weapons(weapons):
+    """Pack the names, inputs and balance of weapon definitions as a table."""
+    body = b''.join(
+        weapon.name.encode() + b'\0' + STATS.pack(
+            INPUTS.index(weapon.input), weapon.damage, weapon.speed,
+            -1 if weapon.range is None else weapon.range, weapon.radius
+        )
+        for weapon in weapons
+    )
+    return TABLE.pack(TABLE.size + len(body), len(weapons)) + body
+
+def decode_weapons(buffer, offset=0):
+    """Unpack a weapon table into rows and the offset just past it.
+
+    Each row is (name, input, damage, speed, range, radius).
+    """
+    size, count = TABLE.unpack_from(buffer, offset)
+    end = offset + size
+    offset += TABLE.size
+    rows = []
+    for _ in range(count):
+        stop = bytes(buffer[offset:end]).index(b'\0') + offset
+        name = bytes(buffer[offset:stop]).decode()
+        kind, damage, speed, reach, radius = STATS.unpack_from(buffer, stop + 1)
+        offset = stop + 1 + STATS.size
+        rows.append((name, INPUTS[kind], damage, speed, None if reach < 0 else reach, radius))
+    return rows, end
+
+REGISTRY = WeaponRegistry()
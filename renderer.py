@@ -0,0 +1,265 @@
+# renderer.py
+
+import pygame
+from settings import (
+    WIDTH, HEIGHT, CELL_SIZE, BLACK, FOG_COLOR, RED, GREEN, PURPLE
+)
+from utils import draw_grid
+from sprites import SpriteAtlas, Blits, draw_batched, CHARACTER_COLORS, BAR_HEIGHT
+from profiler import NULL_PROFILER
+
+class Renderer:
+    """Redraws only the parts of the screen that changed since the last frame.
+
+    The black background and grid lines are rendered once into a cached
+    surface, and each button is cached per selection state. Every frame the
+    renderer compares a visual key per drawable with the previous frame;
+    only the areas of drawables that appeared, vanished or changed are
+    restored from the cache, redrawn and pushed with
+    ``pygame.display.update``. An unchanged frame costs no drawing at all.
+
+    Characters, projectiles, mines and lasers are blitted from a
+    ``SpriteAtlas``, and consecutive sprites are drawn with one
+    ``Surface.blits`` call. The screen areas and drawing of game entities
+    live in this module, so the simulation modules never import pygame.
+    """
+
+    def __init__(self, screen, camera=None):
+        self.screen = screen
+        self.camera = camera
+        self.background = pygame.Surface((WIDTH, HEIGHT))
+        self.background.fill(BLACK)
+        draw_grid(self.background)
+        self.button_cache = {}
+        self.previous = None
+        self.previous_view = None
+        self.profiler = NULL_PROFILER
+        self.overlays = []
+        self.fog = (None, None, [])
+        self.atlas = SpriteAtlas()
+
+    def render(self, sim, weapon_buttons):
+        """Draw the changed parts of the frame and update the display."""
+        with self.profiler.phase('draw'):
+            dirty = self.draw_changes(sim, weapon_buttons)
+        if dirty:
+            with self.profiler.phase('display_update'):
+                pygame.display.update(dirty)
+        return dirty
+
+    def draw_changes(self, sim, weapon_buttons):
+        """Redraw changed areas onto the screen surface and return them."""
+        drawables = self.collect_drawables(sim, weapon_buttons)
+        current = {key: rects for key, rects, _ in drawables}
+        view = self.camera.offset if self.camera is not None else None
+        if self.previous is None or view != self.previous_view:
+            # First frame, or the view scrolled and everything moved
+            self.previous_view = view
+            self.draw_scene(self.screen, drawables)
+            self.previous = current
+            return [self.screen.get_rect()]
+        dirty = []
+        for key, rects in self.previous.items():
+            if key not in current:
+                dirty.extend(rects)
+        for key, rects in current.items():
+            if key not in self.previous:
+                dirty.extend(rects)
+        self.previous = current
+        if not dirty:
+            return dirty
+        screen_rect = self.screen.get_rect()
+        dirty = [rect.clip(screen_rect) for rect in dirty]
+        for area in dirty:
+            self.screen.set_clip(area)
+            self.screen.blit(self.background, area, area)
+            draw_batched(self.screen, [
+                draw for _, rects, draw in drawables
+                if area.collidelist(rects) != -1
+            ])
+        self.screen.set_clip(None)
+        return dirty
+
+    def draw_scene(self, surface, drawables):
+        """Draw a complete frame onto a surface."""
+        surface.blit(self.background, (0, 0))
+        draw_batched(surface, [draw for _, _, draw in drawables])
+
+    def collect_drawables(self, sim, weapon_buttons):
+        """Return (key, rects, draw) for everything in view, in draw order.
+
+        A key changes whenever the drawable would look different. Enemies
+        are taken only from the world chunks inside the camera's view, and
+        with fog of war only those the player can see. Bullets, arrows and
+        mines outside the visible cells are skipped before any key or rect
+        is built.
+        """
+        if self.camera is not None:
+            offset = self.camera.offset
+            x0, y0, x1, y1 = self.camera.visible_cells()
+            # One extra row below: its health bars reach into the view
+            enemies = sim.grid.entities_in_rect(x0, y0, x1, y1 + 1)
+        else:
+            offset = (0, 0)
+            x0, y0, x1, y1 = 0, 0, sim.grid.cols, sim.grid.rows
+            enemies = sim.enemies
+        atlas = self.atlas
+        drawables = []
+        visible = sim.visible_cells()
+        if visible is not None:
+            enemies = [e for e in enemies if (e.x, e.y) in visible]
+            drawables.extend(self.fog_drawables(visible, offset, x0, y0, x1, y1))
+        for char in [sim.player] + enemies:
+            key = ('character', id(char), char.x, char.y, char.color,
+                   char.health, char.max_health)
+            if char.color in CHARACTER_COLORS:
+                draw = Blits(atlas.character, char, offset)
+            else:
+                draw = lambda surface, c=char: draw_character(surface, c, offset)
+            drawables.append((key, [character_rect(char, offset)], draw))
+        for bullet in sim.bullets:
+            if bullet.finished or bullet.current_step >= len(bullet.offsets):
+                continue
+            x, y = bullet.cell(bullet.current_step)
+            if x0 <= x < x1 and y0 <= y < y1:
+                key = ('bullet', id(bullet), x, y)
+                rect = bullet_rect(bullet, offset)
+                drawables.append((key, [rect], Blits(atlas.tile, 'bullet', rect.topleft)))
+        for arrow in sim.arrows:
+            if not arrow.finished and x0 <= arrow.x < x1 and y0 <= arrow.y < y1:
+                key = ('arrow', id(arrow), arrow.x, arrow.y)
+                rect = arrow_rect(arrow, offset)
+                drawables.append((key, [rect], Blits(atlas.tile, 'arrow', rect.topleft)))
+        for effects in (sim.spell_effects, sim.laser_effects):
+            for effect in effects:
+                # Pooled effects are reused, so the key includes their geometry
+                if effects is sim.laser_effects:
+                    rects = laser_rects(effect, offset)
+                    draw = Blits(effect.blits, atlas, offset)
+                else:
+                    rects = [spell_rect(effect, offset)]
+                    draw = lambda surface, e=effect: draw_spell(surface, e, offset)
+                key = ('effect', id(effect)) + tuple(tuple(rect) for rect in rects)
+                drawables.append((key, rects, draw))
+        for mine in sim.mines:
+            if mine.active and x0 <= mine.x < x1 and y0 <= mine.y < y1:
+                key = ('mine', id(mine), mine.x, mine.y)
+                rect = mine_rect(mine, offset)
+                drawables.append((key, [rect], Blits(atlas.tile, 'mine', rect.topleft)))
+        for button in weapon_buttons:
+            key = ('button', id(button), button.selected)
+            drawables.append((key, [button.rect], self.cached_button(button)))
+        for overlay in self.overlays:
+            drawables.append(overlay.drawable())
+        return drawables
+
+    def fog_drawables(self, visible, offset, x0, y0, x1, y1):
+        """Return drawables covering the unseen cells in view, a run per row.
+
+        The runs only change when the visible cells or the view do, so they
+        are kept until then; unchanged runs keep their keys and cost nothing.
+        """
+        view = (offset, x0, y0, x1, y1)
+        if self.fog[0] is visible and self.fog[1] == view:
+            return self.fog[2]
+        drawables = []
+        for y in range(y0, y1):
+            x = x0
+            while x < x1:
+                if (x, y) in visible:
+                    x += 1
+                    continue
+                start = x
+                while x < x1 and (x, y) not in visible:
+                    x += 1
+                rect = pygame.Rect(
+                    start * CELL_SIZE + offset[0], y * CELL_SIZE + offset[1],
+                    (x - start) * CELL_SIZE, CELL_SIZE
+                )
+                drawables.append((
+                    ('fog', start, x, y), [rect],
+                    lambda surface, r=rect: surface.fill(FOG_COLOR, r)
+                ))
+        self.fog = (visible, view, drawables)
+        return drawables
+
+    def cached_button(self, button):
+        """Return a draw function that blits a pre-rendered button."""
+        cache_key = (button.text, button.rect.topleft, button.selected)
+        image = self.button_cache.get(cache_key)
+        if image is None:
+            scratch = pygame.Surface((WIDTH, HEIGHT))
+            button.draw(scratch)
+            image = scratch.subsurface(button.rect).copy()
+            self.button_cache[cache_key] = image
+        return lambda surface: surface.blit(image, button.rect)
+
+def character_rect(char, offset=(0, 0)):
+    """Return the screen area covered by a character and its health bar."""
+    top = char.y * CELL_SIZE - BAR_HEIGHT - 2 + offset[1]
+    return pygame.Rect(
+        char.x * CELL_SIZE + offset[0], top, CELL_SIZE, CELL_SIZE + BAR_HEIGHT + 2
+    )
+
+def draw_character(surface, char, offset=(0, 0)):
+    """Draw a character of any color and its health bar with ``pygame.draw``."""
+    x = char.x * CELL_SIZE + offset[0]
+    y = char.y * CELL_SIZE + offset[1]
+    pygame.draw.rect(surface, char.color, (x, y, CELL_SIZE, CELL_SIZE))
+    bar_width = int(CELL_SIZE * char.health / char.max_health)
+    bar_y = y - BAR_HEIGHT - 2
+    pygame.draw.rect(surface, RED, (x, bar_y, CELL_SIZE, BAR_HEIGHT))
+    pygame.draw.rect(surface, GREEN, (x, bar_y, bar_width, BAR_HEIGHT))
+
+def bullet_rect(bullet, offset=(0, 0)):
+    """Return the screen area covered by a bullet."""
+    x, y = bullet.cell(min(bullet.current_step, len(bullet.offsets) - 1))
+    return pygame.Rect(
+        x * CELL_SIZE + CELL_SIZE // 4 + offset[0],
+        y * CELL_SIZE + CELL_SIZE // 4 + offset[1],
+        CELL_SIZE // 2,
+        CELL_SIZE // 2
+    )
+
+def arrow_rect(arrow, offset=(0, 0)):
+    """Return the screen area covered by an arrow."""
+    return pygame.Rect(
+        arrow.x * CELL_SIZE + CELL_SIZE // 3 + offset[0],
+        arrow.y * CELL_SIZE + CELL_SIZE // 3 + offset[1],
+        CELL_SIZE // 3,
+        CELL_SIZE // 3
+    )
+
+def mine_rect(mine, offset=(0, 0)):
+    """Return the screen area covered by a mine."""
+    return pygame.Rect(
+        mine.x * CELL_SIZE + CELL_SIZE // 4 + offset[0],
+        mine.y * CELL_SIZE + CELL_SIZE // 4 + offset[1],
+        CELL_SIZE // 2,
+        CELL_SIZE // 2
+    )
+
+def spell_rect(effect, offset=(0, 0)):
+    """Return the screen area covered by a spell effect's circle."""
+    return pygame.Rect(
+        effect.x - effect.radius + offset[0], effect.y - effect.radius + offset[1],
+        2 * effect.radius + 1, 2 * effect.radius + 1
+    )
+
+def draw_spell(surface, effect, offset=(0, 0)):
+    """Draw a spell effect as a circle outline."""
+    if effect.duration > 0:
+        center = (effect.x + offset[0], effect.y + offset[1])
+        pygame.draw.circle(surface, PURPLE, center, effect.radius, 1)
+
+def laser_rects(effect, offset=(0, 0)):
+    """Return the screen areas covered by a laser effect, one per beam."""
+    return [
+        pygame.Rect(
+            min_x * CELL_SIZE + CELL_SIZE // 3 + offset[0],
+            min_y * CELL_SIZE + CELL_SIZE // 3 + offset[1],
+            (max_x - min_x) * CELL_SIZE + CELL_SIZE // 3,
+            (max_y - min_y) * CELL_SIZE + CELL_SIZE // 3
+        )
+        for min_x, min_y, max_x, max_y in effect.bounds
+    ]
@@ -0,0 +1,199 @@
+# replay.py
+
+import argparse
+import struct
+from settings import ENEMY_MOVES, ENEMY_PATHFINDING
+from simulation import Simulation, WEAPONS, MOVES
+from registry import REGISTRY, TABLE, encode_weapons, decode_weapons
+from snapshot import encode_snapshot, decode_snapshot, PATHFINDING
+from spawner import WaveSpawner, CURVES
+
+# File layout: a fixed header and the table of weapons the game was played
+# with, followed by fixed-size action records, so any action can be located
+# by index without reading the ones before it.
+MAGIC = b'RLRP'
+VERSION = 1
+HEADER = struct.Struct('<4sBqIIIBBBIBIII')
+# magic, version, seed, enemies, cols, rows, fog of war, enemy moves,
+# pathfinding, waves, spawn curve, wave size, wave interval, spawn rate
+NO_WAVES = (0, 0, 0, 0, 0)
+RECORD = struct.Struct('<Bhh')     # opcode, two signed arguments
+
+# Weapons append to the table in weapons.json order; a replay decodes them
+# through the weapon names in its own header
+OPCODES = ('select', 'move') + WEAPONS
+OPCODE_INDEX = {kind: code for code, kind in enumerate(OPCODES)}
+
+def encode_action(action):
+    """Pack an action tuple into a fixed-size record."""
+    kind = action[0]
+    if kind == 'select':
+        args = (WEAPONS.index(action[1]), 0)
+    else:
+        args = tuple(action[1:]) + (0,) * (3 - len(action))
+    return RECORD.pack(OPCODE_INDEX[kind], *args)
+
+def decode_action(record, weapons=WEAPONS):
+    """Unpack a fixed-size record into an action tuple.
+
+    ``weapons`` names the weapons in the order they were recorded in.
+    """
+    code, a, b = RECORD.unpack(record)
+    kind = 'select' if code == 0 else 'move' if code == 1 else weapons[code - 2]
+    if kind == 'select':
+        return (kind, weapons[a])
+    if kind in REGISTRY and REGISTRY[kind].input == 'key':
+        return (kind,)
+    return (kind, a, b)
+
+class ReplayWriter:
+    """Streams the actions of a game to disk as they are performed.
+
+    Assign an instance to ``Simulation.recorder``; records are buffered by
+    the file object and flushed every ``flush_every`` actions so a crash
+    loses at most that many. Pass the game's modes as the ``Simulation``
+    was created with them, and its ``WaveSpawner``, if any, as
+    ``spawner``; it is recorded before any wave has arrived. The weapons
+    and their balance are recorded as they are now, so weapons.json should
+    not be reloaded while recording.
+    """
+
+    def __init__(
+        self, path, seed, num_enemies, cols, rows, fog=False, moves=ENEMY_MOVES,
+        pathfinding=ENEMY_PATHFINDING, spawner=None, flush_every=64
+    ):
+        if spawner is None:
+            waves = NO_WAVES
+        else:
+            waves = (
+                spawner.waves, CURVES.index(spawner.curve), spawner.size,
+                spawner.interval, spawner.rate
+            )
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(
+            MAGIC, VERSION, seed, num_enemies, cols, rows, fog, MOVES.index(moves),
+            PATHFINDING.index(pathfinding), *waves
+        ))
+        self.file.write(encode_weapons(REGISTRY))
+        self.flush_every = flush_every
+        self.pending = 0
+
+    def record(self, action):
+        """Append one action to the log."""
+        self.file.write(encode_action(action))
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.file.flush()
+            self.pending = 0
+
+    def close(self):
+        """Flush and close the log."""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class Replay:
+    """Re-simulates a recorded game headless and seeks through it.
+
+    While playing forward, a binary snapshot of the simulation is kept every
+    ``snapshot_interval`` actions; ``seek`` restarts from the nearest one
+    instead of from the first action.
+    """
+
+    def __init__(self, path, snapshot_interval=100):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        with open(path, 'rb') as file:
+            header = file.read(HEADER.size)
+            if header[:4] != MAGIC:
+                raise ValueError(f"{path} is not a replay file")
+            if header[4:5] != bytes([VERSION]):
+                raise ValueError(f"Unsupported replay version {header[4:5]!r}")
+            table = file.read(TABLE.size)
+            if len(table) == TABLE.size:
+                table += file.read(TABLE.unpack(table)[0] - TABLE.size)
+            if len(header) < HEADER.size or len(table) < TABLE.size or (
+                len(table) < TABLE.unpack_from(table)[0]
+            ):
+                raise ValueError(f"{path} is truncated")
+            file.seek(0, 2)
+            size = file.tell()
+        fields = HEADER.unpack(header)
+        rows, end = decode_weapons(table)
+        self.start = HEADER.size + end
+        self.weapons = check_weapons(rows, path)
+        (_, _, self.seed, self.num_enemies, self.cols, self.rows, fog, moves,
+         pathfinding, waves, curve, wave_size, interval, rate) = fields
+        self.fog = bool(fog)
+        self.moves = MOVES[moves]
+        self.pathfinding = PATHFINDING[pathfinding]
+        spawner = None
+        if waves:
+            spawner = WaveSpawner(waves, CURVES[curve], wave_size, interval, rate)
+        self.length = (size - self.start) // RECORD.size
+        self.snapshots = {0: encode_snapshot(Simulation(
+            self.num_enemies, self.seed, self.pathfinding, cols=self.cols,
+            rows=self.rows, fog=self.fog, moves=self.moves, waves=spawner
+        ))}
+
+    def actions(self, start=0, stop=None):
+        """Stream actions from the log without loading it into memory."""
+        stop = self.length if stop is None else min(stop, self.length)
+        with open(self.path, 'rb') as file:
+            file.seek(self.start + start * RECORD.size)
+            for _ in range(start, stop):
+                yield decode_action(file.read(RECORD.size), self.weapons)
+
+    def seek(self, index):
+        """Return a fresh simulation positioned after ``index`` actions."""
+        index = max(0, min(index, self.length))
+        start = max(i for i in self.snapshots if i <= index)
+        sim = decode_snapshot(self.snapshots[start])
+        for position, action in enumerate(self.actions(start, index), start + 1):
+            sim.step(action)
+            if position % self.snapshot_interval == 0 and position not in self.snapshots:
+                self.snapshots[position] = encode_snapshot(sim)
+        return sim
+
+    def run(self):
+        """Play the whole log at full speed and return the final state."""
+        return self.seek(self.length)
+
+def check_weapons(rows, path):
+    """Check a replay's weapon table against weapons.json; return the names in it.
+
+    A replay can only be re-simulated with the weapons, inputs and balance
+    it was recorded with, so any difference raises ValueError instead of
+    silently diverging. The order may differ: actions are decoded by name.
+    """
+    for name, expects, damage, speed, reach, radius in rows:
+        if name not in REGISTRY:
+            raise ValueError(f"{path} uses weapon {name!r}, which weapons.json lacks")
+        weapon = REGISTRY[name]
+        recorded = (expects, damage, speed, reach, radius)
+        current = (weapon.input, weapon.damage, weapon.speed, weapon.range, weapon.radius)
+        if recorded != current:
+            raise ValueError(
+                f"{path} was recorded with {name} (input, damage, speed, range, radius) "
+                f"{recorded}, but weapons.json now has {current}"
+            )
+    return tuple(row[0] for row in rows)
+
+def main():
+    """Replay a recorded game from the command line."""
+    parser = argparse.ArgumentParser(description="Re-simulate a recorded game.")
+    parser.add_argument('path', help="replay file written by main.py --record")
+    parser.add_argument('--seek', type=int, help="stop after this many actions")
+    args = parser.parse_args()
+    replay = Replay(args.path)
+    sim = replay.run() if args.seek is None else replay.seek(args.seek)
+    outcome = 'won' if sim.is_won() else 'lost' if sim.is_over() else 'in progress'
+    print(f"{replay.length} actions, turn {sim.turn}: {outcome}, "
+          f"player health {sim.player.health}, {len(sim.enemies)} enemies left")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+# server.py
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import time
+from simulation import Simulation, WEAPONS, ACTIONS
+from registry import REGISTRY
+from batch import scripted_policy
+
+# Protocol: one JSON object per line in each direction.
+#   client -> server  {"type": "new", "enemies": 5, "seed": 1}
+#                     {"type": "watch", "match": 3}
+#                     {"type": "action", "action": ["gun", 4, 7]}
+#   server -> client  {"type": "state", ...}   full state, once on joining
+#                     {"type": "delta", ...}   what changed in a turn
+#                     {"type": "error", "message": "..."}
+#                     {"type": "closed", "match": 3}
+DIRECTIONS = {(-1, 0), (1, 0), (0, -1), (0, 1)}
+BACKLOG = 4096  # pending connections; the default of 100 stalls bursts of joins
+SPECTATOR_BUFFER_LIMIT = 1 << 20  # bytes queued before a slow spectator is dropped
+MAX_ENEMIES = 200
+
+def encode_message(message):
+    """Serialize a message as one compact line of JSON."""
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+def parse_action(action, grid):
+    """Validate an action received from a client and return it as a tuple."""
+    if not isinstance(action, list) or not action:
+        raise ValueError("action must be a non-empty list")
+    kind, args = action[0], action[1:]
+    if kind == 'select':
+        if len(args) != 1 or args[0] not in WEAPONS:
+            raise ValueError(f"select needs one of {', '.join(WEAPONS)}")
+        return ('select', args[0])
+    if kind not in ACTIONS:
+        raise ValueError(f"unknown action {kind!r}")
+    if not all(type(arg) is int for arg in args):
+        raise ValueError("action arguments must be integers")
+    expects = 'direction' if kind == 'move' else REGISTRY[kind].input
+    if expects == 'key':
+        if args:
+            raise ValueError(f"{kind} takes no arguments")
+    elif len(args) != 2:
+        raise ValueError(f"{kind} takes two arguments")
+    elif expects == 'direction':
+        if tuple(args) not in DIRECTIONS:
+            raise ValueError(f"{kind} needs a unit direction")
+    elif not grid.in_bounds(*args):
+        # Also bounds the work a shot can cause
+        raise ValueError(f"{kind} target is outside the map")
+    return (kind, *args)
+
+class Match:
+    """One authoritative game and the per-turn deltas sent to its clients.
+
+    The state last sent to clients is kept as a baseline of plain tuples;
+    after each action only the fields that differ from it are sent.
+    Enemies are given ids in order of appearance so clients can follow them.
+    """
+
+    def __init__(self, match_id, num_enemies=5, seed=None):
+        self.id = match_id
+        self.sim = Simulation(num_enemies, seed)
+        self.owner = None
+        self.clients = set()
+        self.uids = {}
+        self.next_uid = 0
+        self.player, self.enemies, self.mines = self.capture()
+
+    def capture(self):
+        """Return the player, enemies by id and mines as plain values."""
+        sim = self.sim
+        player = sim.player
+        uids = self.uids
+        enemies = {}
+        for enemy in sim.enemies:
+            uid = uids.get(enemy)
+            if uid is None:
+                uid = uids[enemy] = self.next_uid
+                self.next_uid += 1
+            enemies[uid] = (enemy.x, enemy.y, enemy.health, enemy.max_health)
+        if len(uids) > len(enemies):
+            # Forget the dead so their objects can be freed
+            alive = set(sim.enemies)
+            for enemy in [enemy for enemy in uids if enemy not in alive]:
+                del uids[enemy]
+        mines = [(mine.x, mine.y) for mine in sim.mines if mine.active]
+        player_state = (
+            player.x, player.y, player.health, player.max_health,
+            player.current_weapon
+        )
+        return player_state, enemies, mines
+
+    def state(self):
+        """The full state clients start from."""
+        sim = self.sim
+        return {
+            'type': 'state', 'match': self.id, 'seed': sim.seed,
+            'cols': sim.grid.cols, 'rows': sim.grid.rows, 'turn': sim.turn,
+            'player': self.player,
+            'enemies': [[uid, *values] for uid, values in self.enemies.items()],
+            'mines': self.mines,
+            'over': sim.is_over(), 'won': sim.is_won(),
+        }
+
+    def delta(self):
+        """Advance the baseline to the current state and return the changes."""
+        sim = self.sim
+        player, enemies, mines = self.capture()
+        message = {'type': 'delta', 'match': self.id, 'turn': sim.turn}
+        if player != self.player:
+            message['player'] = player
+        changed = [
+            [uid, *values] for uid, values in enemies.items()
+            if self.enemies.get(uid) != values
+        ]
+        if changed:
+            message['enemies'] = changed
+        removed = [uid for uid in self.enemies if uid not in enemies]
+        if removed:
+            message['removed'] = removed
+        if mines != self.mines:
+            message['mines'] = mines
+        if sim.is_over():
+            message['over'] = True
+            message['won'] = sim.is_won()
+        self.player, self.enemies, self.mines = player, enemies, mines
+        return message
+
+    def act(self, action):
+        """Play an action through to the player's next turn; return the delta.
+
+        Raises ValueError once the game is over; the delta that ended it
+        already told every client.
+        """
+        if self.sim.is_over():
+            raise ValueError(f"match {self.id} is over")
+        self.sim.step(parse_action(action, self.sim.grid))
+        return self.delta()
+
+class GameServer:
+    """Runs many matches in one process, one asyncio task per connection.
+
+    A match is owned by the connection that created it, which is the only
+    one allowed to act; other connections may watch it. Matches cost
+    nothing while waiting for their player's next action.
+    """
+
+    def __init__(self):
+        self.matches = {}
+        self.next_match = 0
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8765):
+        """Start listening; port 0 picks a free port, see ``port``."""
+        self.server = await asyncio.start_server(
+            self.handle_client, host, port, backlog=BACKLOG
+        )
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stop accepting connections."""
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection until it disconnects."""
+        match = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    match = self.dispatch(message, match, writer)
+                except (ValueError, KeyError, TypeError) as error:
+                    writer.write(encode_message({'type': 'error', 'message': str(error)}))
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # Disconnected, or sent a line longer than the stream limit
+            pass
+        finally:
+            if match is not None:
+                self.leave(match, writer)
+            writer.close()
+
+    def dispatch(self, message, match, writer):
+        """Handle one client message; return the match the client is in."""
+        kind = message['type']
+        if kind == 'new':
+            if match is not None:
+                self.leave(match, writer)
+            num_enemies = message.get('enemies', 5)
+            seed = message.get('seed')
+            if type(num_enemies) is not int or not 1 <= num_enemies <= MAX_ENEMIES:
+                raise ValueError(f"enemies must be between 1 and {MAX_ENEMIES}")
+            if seed is not None and type(seed) is not int:
+                raise ValueError("seed must be an integer")
+            match = Match(self.next_match, num_enemies, seed)
+            self.next_match += 1
+            self.matches[match.id] = match
+            match.owner = writer
+            match.clients.add(writer)
+            writer.write(encode_message(match.state()))
+        elif kind == 'watch':
+            if match is not None:
+                self.leave(match, writer)
+            match = self.matches.get(message.get('match'))
+            if match is None:
+                raise ValueError(f"no match {message.get('match')!r}")
+            match.clients.add(writer)
+            writer.write(encode_message(match.state()))
+        elif kind == 'action':
+            if match is None or match.owner is not writer:
+                raise ValueError("only the player who started a match can act")
+            self.broadcast(match, encode_message(match.act(message['action'])))
+        else:
+            raise ValueError(f"unknown message type {kind!r}")
+        return match
+
+    def broadcast(self, match, data):
+        """Send a message to everyone in a match, dropping stalled spectators."""
+        for client in list(match.clients):
+            if client is not match.owner and (
+                client.transport.get_write_buffer_size() > SPECTATOR_BUFFER_LIMIT
+            ):
+                match.clients.discard(client)
+                client.close()
+                continue
+            client.write(data)
+
+    def leave(self, match, writer):
+        """Remove a client; a match ends when its owner leaves."""
+        match.clients.discard(writer)
+        if match.owner is writer:
+            del self.matches[match.id]
+            closed = encode_message({'type': 'closed', 'match': match.id})
+            for client in match.clients:
+                client.write(closed)
+            match.clients.clear()
+
+class RemoteCharacter:
+    """A character as known to a client."""
+
+    __slots__ = ('uid', 'x', 'y', 'health', 'max_health')
+
+    def __init__(self, uid, x, y, health, max_health):
+        self.uid = uid
+        self.x = x
+        self.y = y
+        self.health = health
+        self.max_health = max_health
+
+class LoopbackClient:
+    """Stand-in client that keeps a mirror of a match from its deltas.
+
+    The mirror has ``player`` and ``enemies`` like a ``Simulation``, so
+    the batch policies can drive it.
+    """
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.match = None
+        self.player = None
+        self.weapon = None
+        self.characters = {}
+        self.mines = []
+        self.turn = 0
+        self.over = False
+        self.won = False
+
+    @property
+    def enemies(self):
+        return list(self.characters.values())
+
+    async def connect(self, host='127.0.0.1', port=8765):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    async def request(self, message):
+        """Send a message and apply the reply."""
+        self.writer.write(encode_message(message))
+        await self.writer.drain()
+        reply = json.loads(await self.reader.readline())
+        if reply['type'] == 'error':
+            raise ValueError(reply['message'])
+        self.apply(reply)
+        return reply
+
+    async def new_match(self, num_enemies=5, seed=None):
+        return await self.request({'type': 'new', 'enemies': num_enemies, 'seed': seed})
+
+    async def watch(self, match_id):
+        return await self.request({'type': 'watch', 'match': match_id})
+
+    async def act(self, action):
+        return await self.request({'type': 'action', 'action': list(action)})
+
+    async def receive(self):
+        """Wait for and apply the next pushed message, e.g. as a spectator."""
+        message = json.loads(await self.reader.readline())
+        self.apply(message)
+        return message
+
+    def apply(self, message):
+        """Update the mirror from a full state or a delta."""
+        kind = message['type']
+        if kind == 'state':
+            self.match = message['match']
+            self.characters = {}
+        elif kind != 'delta':
+            return
+        self.turn = message['turn']
+        if 'player' in message:
+            x, y, health, max_health, self.weapon = message['player']
+            self.player = RemoteCharacter(None, x, y, health, max_health)
+        for uid, x, y, health, max_health in message.get('enemies', ()):
+            self.characters[uid] = RemoteCharacter(uid, x, y, health, max_health)
+        for uid in message.get('removed', ()):
+            del self.characters[uid]
+        if 'mines' in message:
+            self.mines = [tuple(mine) for mine in message['mines']]
+        self.over = message.get('over', False)
+        self.won = message.get('won', False)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+def mirrors_match(client, match):
+    """Check that a client's mirror agrees with the server's simulation."""
+    sim = match.sim
+    player = sim.player
+    return (
+        (client.player.x, client.player.y, client.player.health, client.weapon)
+        == (player.x, player.y, player.health, player.current_weapon)
+        and sorted((e.x, e.y, e.health) for e in client.enemies)
+        == sorted((e.x, e.y, e.health) for e in sim.enemies)
+        and client.mines == [(m.x, m.y) for m in sim.mines if m.active]
+        and client.turn == sim.turn
+    )
+
+async def load_test(matches=1000, turns=20, num_enemies=5, think=0.0, host='127.0.0.1'):
+    """Play many concurrent matches against an in-process server over loopback."""
+    server = GameServer()
+    await server.start(host, 0)
+    mismatches = 0
+    played = 0
+    peak = 0
+
+    async def play(index):
+        nonlocal mismatches, played, peak
+        rng = random.Random(index)
+        client = LoopbackClient()
+        await client.connect(host, server.port)
+        await client.new_match(num_enemies, seed=index)
+        peak = max(peak, len(server.matches))
+        for _ in range(turns):
+            if client.over:
+                break
+            if think:
+                # Low-activity players spend most of their time thinking
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+            await client.act(scripted_policy(client, rng))
+            played += 1
+        if not mirrors_match(client, server.matches[client.match]):
+            mismatches += 1
+        await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play(index) for index in range(matches)))
+    elapsed = time.perf_counter() - start
+    await server.close()
+    return {
+        'matches': matches, 'peak_concurrent': peak, 'turns': played,
+        'seconds': elapsed, 'turns_per_second': played / elapsed,
+        'mismatches': mismatches,
+    }
+
+def main():
+    """Run the server, or a load test against it, from the command line."""
+    parser = argparse.ArgumentParser(description="Authoritative multi-match game server.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="accept clients until interrupted")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    test = commands.add_parser('loadtest', help="play loopback clients against a server")
+    test.add_argument('--matches', type=int, default=1000)
+    test.add_argument('--turns', type=int, default=20)
+    test.add_argument('--enemies', type=int, default=5)
+    test.add_argument('--think', type=float, default=0.0,
+                      help="mean seconds a client waits between actions")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        async def serve_forever():
+            server = GameServer()
+            await server.start(args.host, args.port)
+            await server.server.serve_forever()
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(serve_forever())
+        return
+    result = asyncio.run(load_test(args.matches, args.turns, args.enemies, args.think))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
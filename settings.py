@@ -1,19 +1,61 @@
 # settings.py
 
-import pygame
-
-# Initialize Pygame
-pygame.init()
+import os
 
 # Screen dimensions
 WIDTH, HEIGHT = 600, 600  # Increased size to accommodate buttons
 
-# Grid dimensions
+# Grid dimensions (the cells visible in the window)
 ROWS, COLS = 30, 30
 CELL_SIZE = WIDTH // COLS
 
+# World dimensions; larger than the grid above, the view scrolls with the player
+WORLD_ROWS, WORLD_COLS = ROWS, COLS
+CHUNK_SIZE = 32  # Cells per side of a lazily allocated world chunk
+
 # Frame rate
 FPS = 60
+IDLE_TIMEOUT = 500  # ms to sleep waiting for input before redrawing anyway
+
+# Weapon damage, speeds, ranges and input bindings (see registry.py)
+WEAPONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weapons.json')
+COLLISION_DAMAGE = 1  # Taken by both characters when one walks into the other
+
+# Enemy pathfinding: 'greedy' steps straight at the player, 'field' follows
+# a BFS distance field computed from the player once per turn
+ENEMY_PATHFINDING = 'greedy'
+PATHFINDING_RADIUS = 64  # Cells searched around the player in 'field' mode
+
+# How enemies move: 'simultaneous' resolves every move at once from the
+# positions at the start of the turn; 'sequential' moves them in list
+# order, each seeing the moves before it
+ENEMY_MOVES = 'simultaneous'
+
+# Fog of war: the player sees, and is seen by, only the enemies in line of
+# sight within VISION_RADIUS cells; other enemies are hidden and hold still
+FOG_OF_WAR = False
+VISION_RADIUS = 8
+FOV_CACHE_SIZE = 4096  # Observer positions whose visible cells are kept
+
+# Enemy waves: after the starting enemies, WAVES more waves arrive every
+# WAVE_INTERVAL turns (or as soon as the board is cleared), sized by
+# SPAWN_CURVE ('constant', 'linear' or 'exponential') from WAVE_SIZE, and
+# stream in at most SPAWN_RATE enemies per turn. 0 waves turns them off
+WAVES = 0
+WAVE_INTERVAL = 10
+WAVE_SIZE = 5
+SPAWN_CURVE = 'linear'
+SPAWN_RATE = 50
+SPAWN_TRIES = 32  # Random cells drawn in a row before listing the free ones
+
+# Combat events: hits are kept in a ring buffer of COMBAT_LOG_CAPACITY and
+# handed to the log's sinks every COMBAT_LOG_BATCH events and every turn
+COMBAT_LOG_CAPACITY = 4096
+COMBAT_LOG_BATCH = 1024
+COMBAT_LOG_LINES = 5  # Events shown on screen
+
+# Resolve spells, lasers and mines over NumPy arrays (needs NumPy)
+USE_ENEMY_ARRAYS = False
 
 # Colors (RGB tuples)
 WHITE = (255, 255, 255)
@@ -27,11 +69,12 @@ YELLOW = (255, 255, 0)
 PURPLE = (150, 0, 150)
 ORANGE = (255, 165, 0)
 CYAN = (0, 255, 255)
+FOG_COLOR = (20, 20, 30)  # Cells out of the player's sight
 
 # Font settings
 FONT_NAME = None  # Default font
 FONT_SIZE = 24
+TEXT_CACHE_SIZE = 128  # Rendered text surfaces kept by fonts.render_text
 
-# Initialize the screen
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Simple Roguelike")
+# Window caption
+CAPTION = "Simple Roguelike"
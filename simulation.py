@@ -0,0 +1,432 @@
+# simulation.py
+
+import random
+from settings import (
+    CELL_SIZE, BLUE, WORLD_COLS, WORLD_ROWS,
+    ENEMY_PATHFINDING, PATHFINDING_RADIUS, USE_ENEMY_ARRAYS, FOG_OF_WAR,
+    ENEMY_MOVES, COLLISION_DAMAGE, WAVES
+)
+from registry import REGISTRY
+from character import Character
+from weapons import (
+    Bullet, Arrow, cast_spell, place_mine, check_mines, fire_laser
+)
+from effects import SpellEffect, LaserEffect
+from utils import remove_dead_characters
+from spawner import WaveSpawner, spawn_enemies
+from spatial import ChunkedGrid
+from fov import FieldOfView
+from pools import EntityPool
+from profiler import NULL_PROFILER
+from combat import NULL_LOG
+
+# Actions are plain tuples so they can be produced by the pygame front end,
+# scripts, or AI agents alike:
+#   ('select', weapon)  ('move', dx, dy)  ('sword',)  ('gun', x, y)
+#   ('bow', dx, dy)     ('spell', x, y)   ('mine', x, y)  ('laser',)
+WEAPONS = REGISTRY.names
+MOVES = ('sequential', 'simultaneous')
+
+class Simulation:
+    """Holds the full game state and advances it without any display."""
+
+    def __init__(
+        self, num_enemies=5, seed=None, pathfinding=ENEMY_PATHFINDING,
+        vectorized=USE_ENEMY_ARRAYS, cols=WORLD_COLS, rows=WORLD_ROWS,
+        fog=FOG_OF_WAR, moves=ENEMY_MOVES, waves=WAVES
+    ):
+        """Create a new game, optionally seeding enemy placement.
+
+        ``waves`` is a number of enemy waves to follow the starting enemies,
+        using the settings for their size and pace, or a ``WaveSpawner``.
+        """
+        if seed is None:
+            # Always have a concrete seed so any game can be recorded
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.num_enemies = num_enemies
+        self.pathfinding = pathfinding
+        self.moves = moves
+        self.rng = random.Random(seed)
+        self.grid = ChunkedGrid(cols, rows)
+        self.player, self.enemies = initialize_characters(
+            num_enemies, self.grid, self.rng
+        )
+        self.bullets, self.arrows = EntityPool(Bullet), EntityPool(Arrow)
+        self.spell_effects = EntityPool(SpellEffect)
+        self.laser_effects = EntityPool(LaserEffect)
+        self.mines = []
+        self.enemy_arrays = None
+        if vectorized:
+            # Imported on demand so plain games never load NumPy
+            from enemy_arrays import EnemyArrays
+            self.enemy_arrays = EnemyArrays(self.grid.cols)
+            self.enemy_arrays.sync(self.enemies)
+        self.fov = FieldOfView(self.grid) if fog else None
+        self.field = (None, None)  # Cache key and the last distance field
+        if isinstance(waves, int):
+            waves = WaveSpawner(waves) if waves else None
+        self.spawner = waves
+        self.player_turn = True
+        self.waiting_for_actions = False
+        self.turn = 0
+        self.recorder = None
+        self.profiler = NULL_PROFILER
+        self.log = NULL_LOG
+
+    def set_log(self, log):
+        """Send this game's combat events to a ``CombatLog``."""
+        log.player = self.player
+        log.turn = self.turn
+        self.log = log
+
+    def visible_cells(self):
+        """Return the cells the player can see, or None without fog of war.
+
+        Sight is treated as mutual: an enemy sees the player when it stands
+        on one of these cells, so one field answers for every enemy.
+        """
+        if self.fov is None:
+            return None
+        return self.fov.visible_from(self.player.x, self.player.y)
+
+    def distance_field(self):
+        """Return the distance field to the player, routing around the enemies.
+
+        The enemies' cells are obstacles, so enemies walk around each other
+        instead of into each other. The field is kept until the player moves
+        or something changes in the grid chunks within the search window.
+        """
+        from pathfinding import DistanceField
+        x, y, r = self.player.x, self.player.y, PATHFINDING_RADIUS
+        window = (x - r, y - r, x + r + 1, y + r + 1)
+        key = (x, y, self.grid.region_version(*window))
+        if self.field[0] != key:
+            blocked = [(enemy.x, enemy.y) for enemy in self.grid.entities_in_rect(*window)]
+            self.field = (key, DistanceField(
+                self.grid.cols, self.grid.rows, x, y, blocked, max_distance=r
+            ))
+        return self.field[1]
+
+    def accepts_input(self):
+        """Check if the player may act right now."""
+        return self.player_turn and not self.waiting_for_actions
+
+    def perform(self, action):
+        """Apply a player action; return True if it used up the turn."""
+        if not self.accepts_input():
+            return False
+        kind = action[0]
+        if kind == 'select':
+            self.player.current_weapon = action[1]
+            if self.recorder is not None:
+                self.recorder.record(action)
+            return False
+        handler = ACTIONS.get(kind)
+        if handler is None:
+            raise ValueError(f"Unknown action: {action!r}")
+        if handler(self, *action[1:]):
+            # The action hit at once; projectiles and mines report their
+            # hits as the frames run
+            self.enemies[:] = remove_dead_characters(self.enemies, self.grid)
+        if self.recorder is not None:
+            self.recorder.record(action)
+        self.player_turn = False
+        self.waiting_for_actions = True
+        return True
+
+    def move_player(self, dx, dy):
+        """Step the player, colliding with any enemy in the way."""
+        return self.player.move(dx, dy, self.grid, log=self.log)
+
+    def swing_sword(self):
+        """Hit the first adjacent enemy."""
+        return self.player.attack_with_sword(self.grid, self.log)
+
+    def fire_gun(self, target_x, target_y):
+        """Shoot a bullet at a target cell."""
+        self.bullets.spawn(
+            self.player.x, self.player.y, target_x, target_y,
+            speed=REGISTRY['gun'].speed
+        )
+
+    def shoot_bow(self, dx, dy):
+        """Shoot an arrow in a direction."""
+        bow = REGISTRY['bow']
+        self.arrows.spawn(
+            self.player.x, self.player.y, (dx, dy),
+            speed=bow.speed, range_limit=bow.range
+        )
+
+    def cast_spell(self, target_x, target_y):
+        """Damage every enemy around a target cell."""
+        hit = cast_spell(target_x, target_y, self.grid, self.log)
+        self.spell_effects.spawn(
+            x=target_x * CELL_SIZE + CELL_SIZE // 2,
+            y=target_y * CELL_SIZE + CELL_SIZE // 2,
+            radius=REGISTRY['spell'].radius * CELL_SIZE
+        )
+        return hit
+
+    def place_mine(self, x, y):
+        """Arm a mine on a cell."""
+        place_mine(x, y, self.mines)
+
+    def fire_laser(self):
+        """Damage every enemy in the player's row and column."""
+        paths = []
+        if self.enemy_arrays is not None:
+            hit = self.enemy_arrays.fire_laser(self.player, self.grid, paths, self.log)
+        else:
+            hit = fire_laser(self.player, self.grid, paths, self.log)
+        self.laser_effects.spawn(paths)
+        return hit
+
+    def tick(self):
+        """Advance one frame; the enemies move once pending actions finish."""
+        if self.accepts_input():
+            # Nothing moves while waiting for the player, so skip the O(n) pass
+            return False
+        with self.profiler.phase('update_game_state'):
+            self.waiting_for_actions = update_game_state(
+                self.bullets, self.arrows, self.spell_effects,
+                self.laser_effects, self.mines, self.enemies, self.grid, self.log
+            )
+        if not self.waiting_for_actions and not self.player_turn:
+            self.end_turn()
+        return self.waiting_for_actions
+
+    def end_turn(self):
+        """Move the enemies, settle mines and hand the turn back to the player.
+
+        This is the one place the ``EnemyArrays`` are synced: before the
+        moves when they resolve them, after the moves otherwise.
+        """
+        field = self.distance_field() if self.pathfinding == 'field' else None
+        visible = self.visible_cells()
+        with self.profiler.phase('handle_enemies_turn'):
+            if self.moves == 'simultaneous':
+                resolve_enemies_turn(
+                    self.enemies, self.player, self.grid, field, visible,
+                    self.enemy_arrays, self.log
+                )
+            else:
+                handle_enemies_turn(
+                    self.enemies, self.player, self.grid, field, visible, self.log
+                )
+        check_mines(self.mines, self.grid, self.log)
+        self.enemies[:] = remove_dead_characters(self.enemies, self.grid)
+        self.player_turn = True
+        self.turn += 1
+        spawned = []
+        if self.spawner is not None and self.player.health > 0:
+            spawned = self.spawner.update(
+                self.turn, self.player, self.enemies, self.grid, self.rng
+            )
+        if self.enemy_arrays is not None:
+            if self.moves == 'simultaneous':
+                # resolve_moves kept the arrays' cells current
+                self.enemy_arrays.extend(spawned)
+            else:
+                self.enemy_arrays.sync(self.enemies)
+        if self.log.enabled:
+            self.log.turn = self.turn
+            self.log.flush()
+
+    def step(self, action):
+        """Apply an action and run frames until it is the player's turn again."""
+        if not self.perform(action):
+            return False
+        while not self.player_turn:
+            self.tick()
+        return True
+
+    def is_over(self):
+        """Check if the game has been won or lost."""
+        return self.player.health <= 0 or self.is_won()
+
+    def is_won(self):
+        """Check if every enemy, waves included, is defeated with the player alive."""
+        return (
+            self.player.health > 0 and not self.enemies
+            and (self.spawner is None or self.spawner.finished)
+        )
+
+# Dispatch table from action kind to the Simulation method that applies it;
+# a new weapon registers its handler here under its name in weapons.json.
+# A handler returns True if it damaged an enemy at once, so the dead are
+# removed before the frames run
+ACTIONS = {
+    'move': Simulation.move_player,
+    'sword': Simulation.swing_sword,
+    'gun': Simulation.fire_gun,
+    'bow': Simulation.shoot_bow,
+    'spell': Simulation.cast_spell,
+    'mine': Simulation.place_mine,
+    'laser': Simulation.fire_laser,
+}
+
+def initialize_characters(num_enemies, grid, rng=random):
+    """Initialize the player and enemies."""
+    player = Character(grid.cols // 2, grid.rows // 2, BLUE, 10)
+    enemies = create_enemies(player, num_enemies, grid, rng)
+    return player, enemies
+
+def create_enemies(player, num_enemies, grid, rng=random):
+    """Create a list of enemy characters and index them in the grid.
+
+    A board too small for them all gets as many as fit.
+    """
+    return spawn_enemies(player, num_enemies, grid, rng)
+
+def update_game_state(
+    bullets, arrows, spell_effects, laser_effects, mines, enemies, grid, log=NULL_LOG
+):
+    """Update bullets, arrows, and spell effects.
+
+    Dead enemies are removed only on frames where a projectile or mine hit,
+    so a frame without hits costs nothing per enemy.
+    """
+    hit = bullets.update(grid, log)
+    hit = arrows.update(grid, log) or hit
+    spell_effects.update()
+    laser_effects.update()
+    hit = check_mines(mines, grid, log) or hit
+    if hit:
+        enemies[:] = remove_dead_characters(enemies, grid)
+    # Check if there are any actions still in progress
+    waiting_for_actions = (
+        bool(bullets) or bool(arrows) or bool(spell_effects) or bool(laser_effects)
+    )
+    return waiting_for_actions
+
+def enemy_steps(enemies, player, field=None, visible=None):
+    """Return the step every enemy intends to take, or None to hold still.
+
+    With a distance field every enemy follows its shortest path to the
+    player; enemies outside the field fall back to stepping straight at it.
+    With a set of ``visible`` cells, only enemies standing on one of them
+    can see the player and move; the rest hold still.
+    """
+    paths = field.next_steps(enemies) if field is not None else [None] * len(enemies)
+    steps = []
+    for enemy, step in zip(enemies, paths):
+        if visible is not None and (enemy.x, enemy.y) not in visible:
+            steps.append(None)
+        else:
+            steps.append(step if step is not None else get_enemy_movement(enemy, player))
+    return steps
+
+def handle_enemies_turn(enemies, player, grid, field=None, visible=None, log=NULL_LOG):
+    """Move the enemies one after another, each seeing the moves before it."""
+    obstacles = (player,)
+    for enemy, step in zip(enemies, enemy_steps(enemies, player, field, visible)):
+        if step is not None:
+            enemy.move(step[0], step[1], grid, obstacles, log)
+
+def resolve_enemies_turn(
+    enemies, player, grid, field=None, visible=None, enemy_arrays=None, log=NULL_LOG
+):
+    """Move every enemy at once, so the result does not depend on list order."""
+    steps = enemy_steps(enemies, player, field, visible)
+    if enemy_arrays is not None:
+        enemy_arrays.sync(enemies)
+        movers, collisions = enemy_arrays.resolve_moves(steps, player, grid)
+    else:
+        movers, collisions = resolve_moves(enemies, steps, player, grid)
+    apply_moves(movers, collisions, grid, log)
+
+# Resolution states of an enemy's intended move
+HOLD, MOVE, BLOCKED, PENDING = range(4)
+
+def resolve_moves(enemies, steps, player, grid):
+    """Resolve simultaneous enemy moves into movers and collisions.
+
+    Returns a list of (enemy, x, y) for every enemy that moves and a list
+    of collisions, each a tuple of the characters that bump. A move fails
+    when it targets the player, when several enemies target the same cell,
+    when two enemies try to swap places, or when the cell's occupant does
+    not leave it. A ring of three or more enemies following each other
+    rotates. Every test goes through dicts keyed by cell, so a turn is O(n).
+    """
+    targets = [None] * len(enemies)
+    claims = {}
+    for index, (enemy, step) in enumerate(zip(enemies, steps)):
+        if step is not None and step != (0, 0):
+            target = (enemy.x + step[0], enemy.y + step[1])
+            if grid.in_bounds(*target):
+                targets[index] = target
+                claims.setdefault(target, []).append(index)
+    occupants = {(enemy.x, enemy.y): index for index, enemy in enumerate(enemies)}
+    player_cell = (player.x, player.y)
+    collisions = []
+    state = [HOLD if target is None else None for target in targets]
+    for target, claimants in claims.items():
+        if target == player_cell:
+            for index in claimants:
+                state[index] = BLOCKED
+                collisions.append((enemies[index], player))
+        elif len(claimants) > 1:
+            for index in claimants:
+                state[index] = BLOCKED
+            collisions.append(tuple(enemies[index] for index in claimants))
+
+    for start in range(len(enemies)):
+        if state[start] is not None:
+            continue
+        if targets[start] not in occupants:
+            # The common case on an open map: the cell is free
+            state[start] = MOVE
+            continue
+        # Follow the chain of occupants this move depends on
+        path = [start]
+        state[start] = PENDING
+        while True:
+            occupant = occupants.get(targets[path[-1]])
+            if occupant is not None and state[occupant] is None:
+                path.append(occupant)
+                state[occupant] = PENDING
+                continue
+            if occupant is not None and state[occupant] == PENDING:
+                # The chain loops back on itself: two enemies swapping
+                # collide, a longer ring rotates
+                if occupant == path[-2]:
+                    state[path[-1]] = state[path[-2]] = BLOCKED
+                    collisions.append((enemies[path[-2]], enemies[path[-1]]))
+                else:
+                    for index in path[path.index(occupant):]:
+                        state[index] = MOVE
+            break
+        # Settle the chain from its end: a move succeeds if the cell empties
+        for index in reversed(path):
+            if state[index] != PENDING:
+                continue
+            occupant = occupants.get(targets[index])
+            if occupant is None or state[occupant] == MOVE:
+                state[index] = MOVE
+            else:
+                state[index] = BLOCKED
+                collisions.append((enemies[index], enemies[occupant]))
+    movers = [
+        (enemies[index], *targets[index])
+        for index in range(len(enemies)) if state[index] == MOVE
+    ]
+    return movers, collisions
+
+def apply_moves(movers, collisions, grid, log=NULL_LOG):
+    """Deal collision damage and move every mover at once."""
+    for characters in collisions:
+        for index, character in enumerate(characters):
+            character.health -= COLLISION_DAMAGE
+            # Each is hit by the other of a pair, or the one before it in a pile-up
+            source = characters[index - 1]
+            log.hit('collision', source.x, source.y, character, COLLISION_DAMAGE)
+    grid.relocate(movers)
+    for enemy, x, y in movers:
+        enemy.x, enemy.y = x, y
+
+def get_enemy_movement(enemy, player):
+    """Determine enemy movement towards the player."""
+    dx = 1 if enemy.x < player.x else -1 if enemy.x > player.x else 0
+    dy = 1 if enemy.y < player.y else -1 if enemy.y > player.y else 0
+    return dx, dy
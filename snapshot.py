@@ -0,0 +1,244 @@
+# snapshot.py
+
+import gc
+import os
+import struct
+import sys
+from array import array
+from settings import RED
+from character import Character
+from weapons import Mine
+from simulation import Simulation, WEAPONS, MOVES
+from registry import REGISTRY, encode_weapons, decode_weapons
+from spawner import WaveSpawner, CURVES
+
+# File layout: a header, the table of weapons, the random generator's
+# state, the player, then one section per kind of entity. Enemies and mines
+# are stored as packed int32 columns so large maps load as slices of one
+# buffer; the few projectiles and effects in flight are stored as
+# fixed-size records. The wave spawner's state comes last.
+MAGIC = b'RLSN'
+VERSION = 1
+HEADER = struct.Struct('<4sBqIIIBBBBBB')
+# magic, version, seed, turn, cols, rows, player_turn, waiting_for_actions,
+# pathfinding, vectorized, fog of war, enemy moves
+# The player's weapon is looked up by name in the weapon table, so a
+# reordered weapons.json still resumes correctly; a resumed game plays with
+# the current balance
+RNG = struct.Struct('<625I?d')     # Mersenne Twister state, gauss_next
+PLAYER = struct.Struct('<iiiiB')   # x, y, health, max_health, weapon
+COUNT = struct.Struct('<I')
+BULLET = struct.Struct('<iiiiiii?')  # start, line end offset, step, speed, frames, finished
+ARROW = struct.Struct('<iiiiiii?i')  # x, y, dx, dy, speed, frames, range, finished, distance
+SPELL = struct.Struct('<iiii')       # x, y, radius, duration
+LASER = struct.Struct('<iB')         # duration, number of beams
+BEAM = struct.Struct('<iiiii')       # first cell, step, length
+SPAWNER = struct.Struct('<?BIIIIIIi')
+# has waves, curve, waves, size, interval, rate, waves arrived, queued, next turn
+
+PATHFINDING = ('greedy', 'field')
+
+def _column(values):
+    """Pack integers into a little-endian int32 column."""
+    column = array('i', values)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column.tobytes()
+
+def _read_column(view, offset, count):
+    """Return the ``count`` int32 values starting at ``offset`` as a list."""
+    column = view[offset:offset + 4 * count].cast('i')
+    if sys.byteorder != 'little':
+        column = array('i', column)
+        column.byteswap()
+    # One bulk conversion is much faster than indexing the view per item
+    return column.tolist(), offset + 4 * count
+
+def _records(record, items):
+    """Pack a count followed by one fixed-size record per item."""
+    return COUNT.pack(len(items)) + b''.join(record.pack(*item) for item in items)
+
+def _read_records(record, buffer, offset):
+    """Unpack a counted run of records, returning them and the next offset."""
+    (count,), offset = COUNT.unpack_from(buffer, offset), offset + COUNT.size
+    end = offset + count * record.size
+    return list(record.iter_unpack(buffer[offset:end])), end
+
+def encode_snapshot(sim):
+    """Serialize the full state of a simulation to bytes."""
+    state = sim.rng.getstate()
+    gauss = state[2]
+    player = sim.player
+    enemies = sim.enemies
+    mines = sim.mines
+    parts = [
+        HEADER.pack(
+            MAGIC, VERSION, sim.seed, sim.turn, sim.grid.cols, sim.grid.rows,
+            sim.player_turn, sim.waiting_for_actions,
+            PATHFINDING.index(sim.pathfinding), sim.enemy_arrays is not None,
+            sim.fov is not None, MOVES.index(sim.moves)
+        ),
+        encode_weapons(REGISTRY),
+        RNG.pack(*state[1], gauss is not None, gauss or 0.0),
+        PLAYER.pack(
+            player.x, player.y, player.health, player.max_health,
+            WEAPONS.index(player.current_weapon)
+        ),
+        COUNT.pack(len(enemies)),
+        _column([enemy.x for enemy in enemies]),
+        _column([enemy.y for enemy in enemies]),
+        _column([enemy.health for enemy in enemies]),
+        _column([enemy.max_health for enemy in enemies]),
+        COUNT.pack(len(mines)),
+        _column([mine.x for mine in mines]),
+        _column([mine.y for mine in mines]),
+        bytes(mine.active for mine in mines),
+        _records(BULLET, [
+            (b.start_x, b.start_y, b.offsets[-1][0], b.offsets[-1][1],
+             b.current_step, b.speed, b.frame_count, b.finished)
+            for b in sim.bullets
+        ]),
+        _records(ARROW, [
+            (a.x, a.y, a.dx, a.dy, a.speed, a.frame_count, a.range_limit,
+             a.finished, a.distance_traveled)
+            for a in sim.arrows
+        ]),
+        _records(SPELL, [(e.x, e.y, e.radius, e.duration) for e in sim.spell_effects]),
+        COUNT.pack(len(sim.laser_effects)),
+    ]
+    for effect in sim.laser_effects:
+        parts.append(LASER.pack(effect.duration, len(effect.paths)))
+        for path in effect.paths:
+            # Beams are straight, so the first cell and a step describe them
+            if len(path) > 1:
+                step = (path[1][0] - path[0][0], path[1][1] - path[0][1])
+            else:
+                step = (0, 0)
+            first = path[0] if path else (0, 0)
+            parts.append(BEAM.pack(first[0], first[1], step[0], step[1], len(path)))
+    spawner = sim.spawner
+    if spawner is None:
+        parts.append(SPAWNER.pack(False, 0, 0, 0, 0, 0, 0, 0, 0))
+    else:
+        parts.append(SPAWNER.pack(
+            True, CURVES.index(spawner.curve), spawner.waves, spawner.size,
+            spawner.interval, spawner.rate, spawner.wave, spawner.queued,
+            spawner.next_turn
+        ))
+    return b''.join(parts)
+
+def decode_snapshot(buffer):
+    """Rebuild a simulation from a snapshot in any bytes-like buffer."""
+    view = memoryview(buffer)
+    if bytes(view[:4]) != MAGIC:
+        raise ValueError("Not a snapshot")
+    if len(view) < HEADER.size or view[4] != VERSION:
+        raise ValueError(f"Unsupported snapshot version {bytes(view[4:5])!r}")
+    header = HEADER.unpack_from(view)
+    rows, offset = decode_weapons(view, HEADER.size)
+    weapons = tuple(row[0] for row in rows)
+    (_, _, seed, turn, cols, rows, player_turn, waiting,
+     pathfinding, vectorized, fog, moves) = header
+    sim = Simulation(
+        0, seed, PATHFINDING[pathfinding], bool(vectorized), cols=cols, rows=rows,
+        fog=bool(fog), moves=MOVES[moves], waves=0
+    )
+    sim.turn = turn
+    sim.player_turn = bool(player_turn)
+    sim.waiting_for_actions = bool(waiting)
+
+    *key, has_gauss, gauss = RNG.unpack_from(view, offset)
+    offset += RNG.size
+    sim.rng.setstate((3, tuple(key), gauss if has_gauss else None))
+
+    x, y, health, max_health, weapon = PLAYER.unpack_from(view, offset)
+    offset += PLAYER.size
+    player = sim.player
+    player.x, player.y, player.health = x, y, health
+    player.max_health = max_health
+    if weapons[weapon] not in REGISTRY:
+        raise ValueError(f"Snapshot player holds {weapons[weapon]!r}, which weapons.json lacks")
+    player.current_weapon = weapons[weapon]
+
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    xs, offset = _read_column(view, offset, count)
+    ys, offset = _read_column(view, offset, count)
+    healths, offset = _read_column(view, offset, count)
+    max_healths, offset = _read_column(view, offset, count)
+    # Creating many objects at once triggers needless cyclic GC passes
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        enemies = [Character(x, y, RED, full) for x, y, full in zip(xs, ys, max_healths)]
+        for enemy, health in zip(enemies, healths):
+            enemy.health = health
+        sim.grid.extend(enemies)
+    finally:
+        if collecting:
+            gc.enable()
+    sim.enemies[:] = enemies
+    sim.num_enemies = count
+    if sim.enemy_arrays is not None:
+        sim.enemy_arrays.sync(enemies)
+
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    xs, offset = _read_column(view, offset, count)
+    ys, offset = _read_column(view, offset, count)
+    active = view[offset:offset + count]
+    offset += count
+    for index in range(count):
+        mine = Mine(xs[index], ys[index])
+        mine.active = bool(active[index])
+        sim.mines.append(mine)
+
+    records, offset = _read_records(BULLET, view, offset)
+    for sx, sy, dx, dy, step, speed, frames, finished in records:
+        bullet = sim.bullets.spawn(sx, sy, sx + dx, sy + dy, speed)
+        bullet.current_step, bullet.frame_count, bullet.finished = step, frames, finished
+    records, offset = _read_records(ARROW, view, offset)
+    for x, y, dx, dy, speed, frames, range_limit, finished, distance in records:
+        arrow = sim.arrows.spawn(x, y, (dx, dy), speed, range_limit)
+        arrow.frame_count, arrow.finished = frames, finished
+        arrow.distance_traveled = distance
+    records, offset = _read_records(SPELL, view, offset)
+    for x, y, radius, duration in records:
+        sim.spell_effects.spawn(x, y, radius, duration)
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        duration, beams = LASER.unpack_from(view, offset)
+        offset += LASER.size
+        paths = []
+        for _ in range(beams):
+            x, y, dx, dy, length = BEAM.unpack_from(view, offset)
+            offset += BEAM.size
+            paths.append([(x + i * dx, y + i * dy) for i in range(length)])
+        sim.laser_effects.spawn(paths, duration)
+
+    (has_waves, curve, waves, size, interval, rate, wave, queued,
+     next_turn) = SPAWNER.unpack_from(view, offset)
+    if has_waves:
+        spawner = WaveSpawner(waves, CURVES[curve], size, interval, rate)
+        spawner.wave, spawner.queued, spawner.next_turn = wave, queued, next_turn
+        sim.spawner = spawner
+    return sim
+
+def save_snapshot(sim, path):
+    """Write a snapshot atomically, so an interrupted autosave keeps the last one."""
+    data = encode_snapshot(sim)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(data)
+    os.replace(temporary, path)
+    return len(data)
+
+def load_snapshot(path):
+    """Load a snapshot, reading the whole file in one call.
+
+    Every section is decoded up front, so the file is simply read rather
+    than memory-mapped.
+    """
+    with open(path, 'rb') as file:
+        return decode_snapshot(file.read())
@@ -0,0 +1,173 @@
+# spatial.py
+
+from settings import WORLD_COLS, WORLD_ROWS, CHUNK_SIZE
+
+class OccupancyGrid:
+    """Maps grid cells to the character standing on them for O(1) lookups."""
+
+    def __init__(self, cols=WORLD_COLS, rows=WORLD_ROWS):
+        self.cols = cols
+        self.rows = rows
+        self.cells = {}
+
+    def in_bounds(self, x, y):
+        """Check if a cell lies inside the grid."""
+        return 0 <= x < self.cols and 0 <= y < self.rows
+
+    def add(self, entity):
+        """Index an entity at its current position."""
+        self.cells[(entity.x, entity.y)] = entity
+
+    def extend(self, entities):
+        """Index many entities at once, e.g. when loading a saved game."""
+        self.cells.update({(entity.x, entity.y): entity for entity in entities})
+
+    def remove(self, entity):
+        """Drop an entity from the index if it is registered."""
+        key = (entity.x, entity.y)
+        if self.cells.get(key) is entity:
+            del self.cells[key]
+
+    def move(self, entity, new_x, new_y):
+        """Re-index an entity that is about to move to a new cell."""
+        key = (entity.x, entity.y)
+        if self.cells.get(key) is entity:
+            del self.cells[key]
+            self.cells[(new_x, new_y)] = entity
+
+    def relocate(self, moves):
+        """Re-index many entities about to move at once, given (entity, x, y).
+
+        Every entity leaves its cell before any arrives, so entities may
+        move into cells others are vacating in the same batch.
+        """
+        cells = self.cells
+        for entity, _, _ in moves:
+            del cells[(entity.x, entity.y)]
+        for entity, x, y in moves:
+            cells[(x, y)] = entity
+
+    def at(self, x, y):
+        """Return the entity at a cell, or None if it is empty."""
+        return self.cells.get((x, y))
+
+    def __contains__(self, cell):
+        return cell in self.cells
+
+    def __len__(self):
+        return len(self.cells)
+
+class ChunkedGrid(OccupancyGrid):
+    """Occupancy grid that also buckets entities into square chunks.
+
+    Chunks are created when the first entity enters them and dropped when
+    the last one leaves, so memory follows the entity count rather than the
+    map size. ``entities_in_rect`` visits only the chunks overlapping the
+    requested area, which keeps viewport queries independent of how many
+    entities live elsewhere on a large map.
+
+    Every chunk also counts the changes made inside it, so a cached result
+    computed over an area (such as a field of view) can tell whether that
+    area changed since with ``region_version``.
+    """
+
+    def __init__(self, cols=WORLD_COLS, rows=WORLD_ROWS, chunk_size=CHUNK_SIZE):
+        super().__init__(cols, rows)
+        self.chunk_size = chunk_size
+        self.chunks = {}
+        self.versions = {}
+
+    def add(self, entity):
+        """Index an entity at its current position."""
+        super().add(entity)
+        key = (entity.x // self.chunk_size, entity.y // self.chunk_size)
+        self.chunks.setdefault(key, {})[(entity.x, entity.y)] = entity
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def extend(self, entities):
+        """Index many entities at once, e.g. when loading a saved game."""
+        super().extend(entities)
+        size = self.chunk_size
+        chunks = self.chunks
+        versions = self.versions
+        for entity in entities:
+            x, y = entity.x, entity.y
+            key = (x // size, y // size)
+            chunk = chunks.get(key)
+            if chunk is None:
+                chunk = chunks[key] = {}
+            chunk[(x, y)] = entity
+        # Bumping every chunk once is cheaper than once per entity
+        for key in chunks:
+            versions[key] = versions.get(key, 0) + 1
+
+    def remove(self, entity):
+        """Drop an entity from the index if it is registered."""
+        if self.cells.get((entity.x, entity.y)) is entity:
+            super().remove(entity)
+            self._unlink(entity.x, entity.y)
+
+    def move(self, entity, new_x, new_y):
+        """Re-index an entity that is about to move to a new cell."""
+        if self.cells.get((entity.x, entity.y)) is entity:
+            super().move(entity, new_x, new_y)
+            self._unlink(entity.x, entity.y)
+            key = (new_x // self.chunk_size, new_y // self.chunk_size)
+            self.chunks.setdefault(key, {})[(new_x, new_y)] = entity
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+    def relocate(self, moves):
+        """Re-index many entities about to move at once, given (entity, x, y)."""
+        super().relocate(moves)
+        size = self.chunk_size
+        chunks = self.chunks
+        touched = set()
+        for entity, _, _ in moves:
+            key = (entity.x // size, entity.y // size)
+            chunk = chunks[key]
+            del chunk[(entity.x, entity.y)]
+            if not chunk:
+                del chunks[key]
+            touched.add(key)
+        for entity, x, y in moves:
+            key = (x // size, y // size)
+            chunk = chunks.get(key)
+            if chunk is None:
+                chunk = chunks[key] = {}
+            chunk[(x, y)] = entity
+            touched.add(key)
+        versions = self.versions
+        for key in touched:
+            versions[key] = versions.get(key, 0) + 1
+
+    def _unlink(self, x, y):
+        """Remove a cell from its chunk, freeing the chunk once empty."""
+        key = (x // self.chunk_size, y // self.chunk_size)
+        chunk = self.chunks[key]
+        del chunk[(x, y)]
+        self.versions[key] += 1
+        if not chunk:
+            del self.chunks[key]
+
+    def entities_in_rect(self, x0, y0, x1, y1):
+        """Return the entities with x0 <= x < x1 and y0 <= y < y1."""
+        size = self.chunk_size
+        found = []
+        for cy in range(max(y0, 0) // size, (max(y1, 1) - 1) // size + 1):
+            for cx in range(max(x0, 0) // size, (max(x1, 1) - 1) // size + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk:
+                    for (x, y), entity in chunk.items():
+                        if x0 <= x < x1 and y0 <= y < y1:
+                            found.append(entity)
+        return found
+
+    def region_version(self, x0, y0, x1, y1):
+        """Return a number that grows whenever a chunk overlapping the area changes."""
+        size = self.chunk_size
+        versions = self.versions
+        return sum(
+            versions.get((cx, cy), 0)
+            for cy in range(max(y0, 0) // size, (max(y1, 1) - 1) // size + 1)
+            for cx in range(max(x0, 0) // size, (max(x1, 1) - 1) // size + 1)
+        )
@@ -0,0 +1,130 @@
+# spawner.py
+
+from settings import (
+    RED, SPAWN_TRIES, WAVE_SIZE, WAVE_INTERVAL, SPAWN_CURVE, SPAWN_RATE
+)
+from character import Character
+
+# How many enemies wave number ``wave`` (counting from 0) brings, given the
+# size of the first wave
+SPAWN_CURVES = {
+    'constant': lambda wave, size: size,
+    'linear': lambda wave, size: size * (wave + 1),
+    'exponential': lambda wave, size: size << wave,
+}
+CURVES = tuple(SPAWN_CURVES)
+
+def free_cells(player, grid, count, rng):
+    """Return up to ``count`` distinct random cells free of enemies and the player.
+
+    While the board is sparse, cells are drawn at random and occupied ones
+    skipped, which costs O(1) per cell. Once ``SPAWN_TRIES`` draws in a row
+    miss, the free cells are listed instead, skipping full chunks, and the
+    rest are sampled from that list, so a nearly full board costs one pass
+    plus O(k) rather than unbounded retries. Fewer cells than asked for are
+    returned only when the board has no more room.
+    """
+    cols, rows = grid.cols, grid.rows
+    occupied = grid.cells
+    player_cell = (player.x, player.y)
+    chosen = []
+    taken = set()
+    misses = 0
+    while len(chosen) < count and misses < SPAWN_TRIES:
+        x = rng.randint(0, cols - 1)
+        y = rng.randint(0, rows - 1)
+        cell = (x, y)
+        if cell in occupied or cell in taken or cell == player_cell:
+            misses += 1
+            continue
+        misses = 0
+        chosen.append(cell)
+        taken.add(cell)
+    if len(chosen) < count:
+        free = [
+            cell for cell in _unoccupied(grid)
+            if cell not in taken and cell != player_cell
+        ]
+        chosen.extend(rng.sample(free, min(count - len(chosen), len(free))))
+    return chosen
+
+def _unoccupied(grid):
+    """Yield every free cell of the grid in row order, skipping full chunks."""
+    cols, rows = grid.cols, grid.rows
+    occupied = grid.cells
+    size = getattr(grid, 'chunk_size', None)
+    if size is None:
+        for y in range(rows):
+            for x in range(cols):
+                if (x, y) not in occupied:
+                    yield (x, y)
+        return
+    chunks = grid.chunks
+    for y0 in range(0, rows, size):
+        y1 = min(y0 + size, rows)
+        for x0 in range(0, cols, size):
+            x1 = min(x0 + size, cols)
+            chunk = chunks.get((x0 // size, y0 // size))
+            if chunk is None:
+                for y in range(y0, y1):
+                    for x in range(x0, x1):
+                        yield (x, y)
+            elif len(chunk) < (x1 - x0) * (y1 - y0):
+                for y in range(y0, y1):
+                    for x in range(x0, x1):
+                        if (x, y) not in chunk:
+                            yield (x, y)
+
+def spawn_enemies(player, count, grid, rng):
+    """Create up to ``count`` enemies on free cells and index them in the grid."""
+    enemies = [Character(x, y, RED, 5) for x, y in free_cells(player, grid, count, rng)]
+    grid.extend(enemies)
+    return enemies
+
+class WaveSpawner:
+    """Brings in ``waves`` more waves of enemies as a game goes on.
+
+    A wave arrives every ``interval`` turns, or at once when the board has
+    been cleared, and its size follows the named spawn curve. Arrivals are
+    queued and streamed onto the board at most ``rate`` per turn, so a
+    large wave fills in over several turns; enemies that find no free cell
+    wait in the queue for the next turn.
+    """
+
+    def __init__(
+        self, waves, curve=SPAWN_CURVE, size=WAVE_SIZE, interval=WAVE_INTERVAL,
+        rate=SPAWN_RATE
+    ):
+        if curve not in SPAWN_CURVES:
+            raise ValueError(f"Unknown spawn curve: {curve!r}")
+        self.waves = waves
+        self.curve = curve
+        self.size = size
+        self.interval = interval
+        self.rate = rate
+        self.wave = 0        # Waves that have arrived so far
+        self.queued = 0      # Enemies of arrived waves not yet on the board
+        self.next_turn = interval
+
+    @property
+    def finished(self):
+        """Check if every wave has arrived and been placed."""
+        return self.wave >= self.waves and not self.queued
+
+    def update(self, turn, player, enemies, grid, rng):
+        """Start any wave due by ``turn`` and place this turn's share of enemies.
+
+        New enemies are appended to ``enemies``; returns them.
+        """
+        if self.wave < self.waves and (
+            turn >= self.next_turn or not (enemies or self.queued)
+        ):
+            self.queued += SPAWN_CURVES[self.curve](self.wave, self.size)
+            self.wave += 1
+            self.next_turn = turn + self.interval
+        if not self.queued:
+            return []
+        spawned = spawn_enemies(player, min(self.queued, self.rate), grid, rng)
+        self.queued -= len(spawned)
+        enemies.extend(spawned)
+        return spawned
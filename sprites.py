@@ -0,0 +1,143 @@
+# sprites.py
+
+from functools import partial
+import pygame
+from settings import (
+    WIDTH, HEIGHT, CELL_SIZE, BLUE, RED, GREEN, YELLOW, WHITE, ORANGE, CYAN
+)
+
+CHARACTER_COLORS = (BLUE, RED)  # Characters of other colors draw themselves
+COLORKEY = (255, 0, 255)        # Transparent in the atlas; no sprite uses it
+BAR_HEIGHT = max(3, CELL_SIZE // 10)
+
+class Blits(partial):
+    """A draw function made of the ``(source, dest, area)`` blits ``make(*args)`` returns.
+
+    The blits are only made when drawn, as most drawables are not redrawn
+    in a given frame. The renderer merges consecutive ``Blits`` into a
+    single ``Surface.blits`` call instead of calling each one. Built on
+    ``partial``, whose constructor is cheap enough to run per entity and
+    frame.
+    """
+
+    def __call__(self, surface):
+        surface.blits(self.func(*self.args), doreturn=False)
+
+def draw_batched(surface, draws):
+    """Call draw functions in order, batching runs of ``Blits`` together."""
+    batch = []
+    for draw in draws:
+        if type(draw) is Blits:
+            batch.extend(draw.func(*draw.args))
+            continue
+        if batch:
+            surface.blits(batch, doreturn=False)
+            batch = []
+        draw(surface)
+    if batch:
+        surface.blits(batch, doreturn=False)
+
+class SpriteAtlas:
+    """Every per-entity sprite pre-rendered once into a single surface.
+
+    Tiles are packed onto shelves of one surface and drawn by blitting an
+    area of it, so a frame draws characters, health bars, projectiles,
+    mines and laser beams without any ``pygame.draw`` calls. A health bar
+    is one tile per filled width. Laser beams come from a strip of evenly
+    spaced squares as long as the screen, cut to each beam's length.
+    """
+
+    def __init__(self):
+        third, half = CELL_SIZE // 3, CELL_SIZE // 2
+        self.beam_cells = max(WIDTH, HEIGHT) // CELL_SIZE + 2
+        strip = (self.beam_cells - 1) * CELL_SIZE + third
+        tiles = [(('body', color), CELL_SIZE, CELL_SIZE) for color in CHARACTER_COLORS]
+        tiles += [(('bar', width), CELL_SIZE, BAR_HEIGHT) for width in range(CELL_SIZE + 1)]
+        tiles += [
+            ('bullet', half, half), ('arrow', third, third), ('mine', half, half),
+            ('beam_x', strip, third), ('beam_y', third, strip),
+        ]
+        self.areas = pack(tiles)
+        size = (
+            max(area.right for area in self.areas.values()),
+            max(area.bottom for area in self.areas.values())
+        )
+        self.surface = pygame.Surface(size)
+        self.surface.fill(COLORKEY)
+        self.surface.set_colorkey(COLORKEY)
+        fill = self.surface.fill
+        areas = self.areas
+        for color in CHARACTER_COLORS:
+            fill(color, areas[('body', color)])
+        for width in range(CELL_SIZE + 1):
+            area = areas[('bar', width)]
+            fill(RED, area)
+            fill(GREEN, (area.x, area.y, width, BAR_HEIGHT))
+        fill(YELLOW, areas['bullet'])
+        fill(WHITE, areas['arrow'])
+        fill(ORANGE, areas['mine'])
+        beam_x, beam_y = areas['beam_x'], areas['beam_y']
+        for index in range(self.beam_cells):
+            fill(CYAN, (beam_x.x + index * CELL_SIZE, beam_x.y, third, third))
+            fill(CYAN, (beam_y.x, beam_y.y + index * CELL_SIZE, third, third))
+
+    def tile(self, name, topleft):
+        """Return the blits drawing one tile with its top left corner at a point."""
+        return [(self.surface, topleft, self.areas[name])]
+
+    def character(self, char, offset=(0, 0)):
+        """Return the blits of a character of a color in ``CHARACTER_COLORS``."""
+        body = self.areas[('body', char.color)]
+        x = char.x * CELL_SIZE + offset[0]
+        y = char.y * CELL_SIZE + offset[1]
+        width = min(max(int(CELL_SIZE * char.health / char.max_health), 0), CELL_SIZE)
+        return [
+            (self.surface, (x, y), body),
+            (self.surface, (x, y - BAR_HEIGHT - 2), self.areas[('bar', width)]),
+        ]
+
+    def beam(self, bounds, offset=(0, 0)):
+        """Return the blit of the on-screen part of a straight beam, or None.
+
+        ``bounds`` is the beam's (min_x, min_y, max_x, max_y) in cells.
+        """
+        min_x, min_y, max_x, max_y = bounds
+        third = CELL_SIZE // 3
+        if min_y == max_y:
+            first = max(min_x, -offset[0] // CELL_SIZE)
+            last = min(max_x, (WIDTH - offset[0]) // CELL_SIZE)
+            area = self.areas['beam_x']
+            if first > last:
+                return None
+            size = ((last - first) * CELL_SIZE + third, third)
+            cell = (first, min_y)
+        else:
+            first = max(min_y, -offset[1] // CELL_SIZE)
+            last = min(max_y, (HEIGHT - offset[1]) // CELL_SIZE)
+            area = self.areas['beam_y']
+            if first > last:
+                return None
+            size = (third, (last - first) * CELL_SIZE + third)
+            cell = (min_x, first)
+        dest = (
+            cell[0] * CELL_SIZE + third + offset[0],
+            cell[1] * CELL_SIZE + third + offset[1]
+        )
+        return (self.surface, dest, pygame.Rect(area.topleft, size))
+
+def pack(tiles):
+    """Place (name, width, height) tiles on shelves; return name -> Rect.
+
+    Tiles are sorted tallest first and laid left to right, starting a new
+    shelf below once a row is as wide as the widest tile.
+    """
+    width = max(tile[1] for tile in tiles)
+    areas = {}
+    x = y = shelf = 0
+    for name, w, h in sorted(tiles, key=lambda tile: -tile[2]):
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        areas[name] = pygame.Rect(x, y, w, h)
+        x += w
+        shelf = max(shelf, h)
+    return areas
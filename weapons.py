@@ -1,14 +1,59 @@
 # weapons.py
 
-import pygame
-import math
-from settings import CELL_SIZE, COLS, ROWS, YELLOW, WHITE, ORANGE, CYAN
+import functools
+from registry import REGISTRY
+from combat import NULL_LOG
+
+@functools.lru_cache(maxsize=1024)
+def line_offsets(dx, dy):
+    """Bresenham's Line Algorithm from (0, 0) to (dx, dy), memoized.
+
+    Lines are translation invariant, so every shot with the same (dx, dy)
+    shares one immutable tuple of offsets.
+    """
+    points = []
+    adx, ady = abs(dx), abs(dy)
+    x, y = 0, 0
+    sx = -1 if dx < 0 else 1
+    sy = -1 if dy < 0 else 1
+    if adx >= ady:
+        err = adx / 2.0
+        while x != dx:
+            points.append((x, y))
+            err -= ady
+            if err < 0:
+                y += sy
+                err += adx
+            x += sx
+        points.append((x, y))
+    else:
+        err = ady / 2.0
+        while y != dy:
+            points.append((x, y))
+            err -= adx
+            if err < 0:
+                x += sx
+                err += ady
+            y += sy
+        points.append((x, y))
+    return tuple(points)
 
 class Bullet:
     """Represents a bullet fired from the gun."""
 
+    __slots__ = (
+        'start_x', 'start_y', 'offsets', 'current_step', 'finished',
+        'speed', 'frame_count'
+    )
+
     def __init__(self, start_x, start_y, target_x, target_y, speed=5):
-        self.path = self.get_line(start_x, start_y, target_x, target_y)
+        self.reset(start_x, start_y, target_x, target_y, speed)
+
+    def reset(self, start_x, start_y, target_x, target_y, speed=5):
+        """Aim the bullet at a target; pooled bullets are reused through this."""
+        self.start_x = start_x
+        self.start_y = start_y
+        self.offsets = line_offsets(target_x - start_x, target_y - start_y)
         self.current_step = 0
         self.finished = False
         self.speed = speed
@@ -16,74 +61,45 @@ class Bullet:
 
     def get_line(self, x0, y0, x1, y1):
         """Calculate the path using Bresenham's Line Algorithm."""
-        points = []
-        dx, dy = abs(x1 - x0), abs(y1 - y0)
-        x, y = x0, y0
-        sx = -1 if x0 > x1 else 1
-        sy = -1 if y0 > y1 else 1
-        if dx >= dy:
-            err = dx / 2.0
-            while x != x1:
-                points.append((x, y))
-                err -= dy
-                if err < 0:
-                    y += sy
-                    err += dx
-                x += sx
-            points.append((x, y))
-        else:
-            err = dy / 2.0
-            while y != y1:
-                points.append((x, y))
-                err -= dx
-                if err < 0:
-                    x += sx
-                    err += dy
-                y += sy
-            points.append((x, y))
-        return points
+        return [(x0 + ox, y0 + oy) for ox, oy in line_offsets(x1 - x0, y1 - y0)]
 
-    def update(self, enemies):
-        """Update the bullet's position and check for collisions."""
+    def cell(self, step):
+        """Return the grid cell at a step along the bullet's path."""
+        ox, oy = self.offsets[step]
+        return self.start_x + ox, self.start_y + oy
+
+    def update(self, grid, log=NULL_LOG):
+        """Update the bullet's position; return True if it hit an enemy."""
         if self.finished:
-            return
+            return False
         self.frame_count += 1
         if self.frame_count >= self.speed:
             self.frame_count = 0
-            self.move(enemies)
+            return self.move(grid, log)
+        return False
 
-    def move(self, enemies):
-        """Move the bullet along its path."""
-        if self.current_step < len(self.path):
-            x, y = self.path[self.current_step]
-            if self.check_collision(x, y, enemies):
+    def move(self, grid, log=NULL_LOG):
+        """Move the bullet along its path; return True if it hit an enemy."""
+        if self.current_step < len(self.offsets):
+            x, y = self.cell(self.current_step)
+            if self.check_collision(x, y, grid, log):
                 self.finished = True
-                return
+                return True
             self.current_step += 1
         else:
             self.finished = True
+        return False
 
-    def check_collision(self, x, y, enemies):
+    def check_collision(self, x, y, grid, log=NULL_LOG):
         """Check for collision with enemies."""
-        for enemy in enemies:
-            if enemy.is_at(x, y):
-                enemy.health -= 2  # Bullet damage
-                print(f"Bullet hit! {enemy} loses 2 health.")
-                return True
+        enemy = grid.at(x, y)
+        if enemy is not None:
+            damage = REGISTRY['gun'].damage
+            enemy.health -= damage
+            log.hit('gun', self.start_x, self.start_y, enemy, damage)
+            return True
         return False
 
-    def draw(self, screen):
-        """Draw the bullet on the screen."""
-        if self.current_step < len(self.path) and not self.finished:
-            x, y = self.path[self.current_step]
-            rect = pygame.Rect(
-                x * CELL_SIZE + CELL_SIZE // 4,
-                y * CELL_SIZE + CELL_SIZE // 4,
-                CELL_SIZE // 2,
-                CELL_SIZE // 2
-            )
-            pygame.draw.rect(screen, YELLOW, rect)
-
     def is_finished(self):
         """Check if the bullet has finished moving."""
         return self.finished
@@ -91,7 +107,16 @@ class Bullet:
 class Arrow:
     """Represents an arrow fired from the bow."""
 
+    __slots__ = (
+        'x', 'y', 'dx', 'dy', 'speed', 'frame_count', 'finished',
+        'range_limit', 'distance_traveled'
+    )
+
     def __init__(self, start_x, start_y, direction, speed=3, range_limit=15):
+        self.reset(start_x, start_y, direction, speed, range_limit)
+
+    def reset(self, start_x, start_y, direction, speed=3, range_limit=15):
+        """Launch the arrow; pooled arrows are reused through this."""
         self.x = start_x
         self.y = start_y
         self.dx, self.dy = direction
@@ -101,103 +126,112 @@ class Arrow:
         self.range_limit = range_limit
         self.distance_traveled = 0
 
-    def update(self, enemies):
-        """Update the arrow's position and check for collisions."""
+    def update(self, grid, log=NULL_LOG):
+        """Update the arrow's position; return True if it hit an enemy."""
         if self.finished:
-            return
+            return False
         self.frame_count += 1
         if self.frame_count >= self.speed:
             self.frame_count = 0
-            self.move(enemies)
+            return self.move(grid, log)
+        return False
 
-    def move(self, enemies):
-        """Move the arrow in its direction."""
+    def move(self, grid, log=NULL_LOG):
+        """Move the arrow in its direction; return True if it hit an enemy."""
         if self.distance_traveled >= self.range_limit:
             self.finished = True
-            return
+            return False
         new_x, new_y = self.x + self.dx, self.y + self.dy
-        if 0 <= new_x < COLS and 0 <= new_y < ROWS:
+        if grid.in_bounds(new_x, new_y):
             self.x, self.y = new_x, new_y
             self.distance_traveled += 1
-            self.check_collision(enemies)
-        else:
-            self.finished = True
+            return self.check_collision(grid, log)
+        self.finished = True
+        return False
 
-    def check_collision(self, enemies):
-        """Check for collision with enemies."""
-        for enemy in enemies:
-            if enemy.is_at(self.x, self.y):
-                enemy.health -= 1  # Arrow damage
-                print(f"Arrow hit! {enemy} loses 1 health.")
-
-    def draw(self, screen):
-        """Draw the arrow on the screen."""
-        if not self.finished:
-            rect = pygame.Rect(
-                self.x * CELL_SIZE + CELL_SIZE // 3,
-                self.y * CELL_SIZE + CELL_SIZE // 3,
-                CELL_SIZE // 3,
-                CELL_SIZE // 3
+    def check_collision(self, grid, log=NULL_LOG):
+        """Check for collision with enemies; return True on a hit."""
+        enemy = grid.at(self.x, self.y)
+        if enemy is not None:
+            damage = REGISTRY['bow'].damage
+            enemy.health -= damage
+            # The arrow flies straight, so its origin is behind it
+            distance = self.distance_traveled
+            log.hit(
+                'bow', self.x - self.dx * distance, self.y - self.dy * distance,
+                enemy, damage
             )
-            pygame.draw.rect(screen, WHITE, rect)
+            return True
+        return False
 
     def is_finished(self):
         """Check if the arrow has finished moving."""
         return self.finished
 
-def cast_spell(target_x, target_y, enemies):
-    """Casts a spell to damage enemies within a radius."""
-    spell_radius = 2
-    spell_damage = 2
-    for enemy in enemies:
-        distance = math.hypot(enemy.x - target_x, enemy.y - target_y)
-        if distance <= spell_radius:
+class Mine:
+    """Represents a mine placed on the grid."""
+
+    __slots__ = ('x', 'y', 'active')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.active = True
+
+    def __repr__(self):
+        """String representation of the mine."""
+        return f"Mine(x: {self.x}, y: {self.y}, active: {self.active})"
+
+def cast_spell(target_x, target_y, grid, log=NULL_LOG):
+    """Casts a spell to damage enemies within a radius; returns True on a hit."""
+    spell = REGISTRY['spell']
+    spell_damage = spell.damage
+    hit = False
+    # The stencil holds the offsets inside the radius, computed once per load
+    for dx, dy in spell.stencil:
+        enemy = grid.at(target_x + dx, target_y + dy)
+        if enemy is not None:
             enemy.health -= spell_damage
-            print(f"Spell hit! {enemy} loses {spell_damage} health.")
+            log.hit('spell', target_x, target_y, enemy, spell_damage)
+            hit = True
+    return hit
 
 def place_mine(x, y, mines):
     """Places a mine at the specified location."""
-    mine = {'x': x, 'y': y, 'active': True}
-    mines.append(mine)
-    print("Mine placed at ({}, {})".format(x, y))
+    mines.append(Mine(x, y))
 
-def check_mines(mines, enemies):
-    """Checks if any enemies step on a mine."""
+def check_mines(mines, grid, log=NULL_LOG):
+    """Checks if any enemies step on a mine; returns True if one went off."""
+    detonated = False
     for mine in mines[:]:
-        if not mine['active']:
+        if not mine.active:
             mines.remove(mine)
             continue
-        for enemy in enemies:
-            if enemy.is_at(mine['x'], mine['y']):
-                enemy.health -= 3  # Mine damage
-                print(f"Mine exploded! {enemy} loses 3 health.")
-                mine['active'] = False
-
-def draw_mines(screen, mines):
-    """Draws active mines on the screen."""
-    for mine in mines:
-        if mine['active']:
-            rect = pygame.Rect(
-                mine['x'] * CELL_SIZE + CELL_SIZE // 4,
-                mine['y'] * CELL_SIZE + CELL_SIZE // 4,
-                CELL_SIZE // 2,
-                CELL_SIZE // 2
-            )
-            pygame.draw.rect(screen, ORANGE, rect)
-
-def fire_laser(player, enemies, laser_paths):
-    """Fires a laser in all four directions."""
-    laser_damage = 2
+        enemy = grid.at(mine.x, mine.y)
+        if enemy is not None:
+            mine_damage = REGISTRY['mine'].damage
+            enemy.health -= mine_damage
+            log.hit('mine', mine.x, mine.y, enemy, mine_damage)
+            mine.active = False
+            detonated = True
+    return detonated
+
+def fire_laser(player, grid, laser_paths, log=NULL_LOG):
+    """Fires a laser in all four directions; returns True on a hit."""
+    laser_damage = REGISTRY['laser'].damage
+    hit = False
     directions = [(-1,0),(1,0),(0,-1),(0,1)]
     for dx, dy in directions:
         path = []
         x, y = player.x + dx, player.y + dy
-        while 0 <= x < COLS and 0 <= y < ROWS:
+        while grid.in_bounds(x, y):
             path.append((x, y))
-            for enemy in enemies:
-                if enemy.is_at(x, y):
-                    enemy.health -= laser_damage
-                    print(f"Laser hit! {enemy} loses {laser_damage} health.")
+            enemy = grid.at(x, y)
+            if enemy is not None:
+                enemy.health -= laser_damage
+                log.hit('laser', player.x, player.y, enemy, laser_damage)
+                hit = True
             x += dx
             y += dy
         laser_paths.append(path)
+    return hit